@@ -0,0 +1,85 @@
+"""Listen- und Portal-Endpunkte mit AsyncSession (nur bei ASYNC_DB=1).
+
+Gleiche Pfade, Abfragen (read_queries) und Antworten wie die synchronen
+Endpunkte in main.py, die ohne ASYNC_DB gelten.
+"""
+from fastapi import APIRouter, Depends, HTTPException
+
+from . import models, read_queries, schemas
+from .auth import get_async_read_db, get_current_async_member_user
+
+router = APIRouter()
+
+
+@router.get("/members", response_model=list[schemas.Member])
+async def list_members(db=Depends(get_async_read_db)):
+    return (await db.execute(read_queries.members())).scalars().all()
+
+
+@router.get("/parcels", response_model=list[schemas.Parcel])
+async def list_parcels(db=Depends(get_async_read_db)):
+    return (await db.execute(read_queries.parcels())).scalars().all()
+
+
+@router.get("/contracts", response_model=list[schemas.Contract])
+async def list_contracts(db=Depends(get_async_read_db)):
+    return (await db.execute(read_queries.contracts())).scalars().all()
+
+
+@router.get("/invoices", response_model=list[schemas.Invoice])
+async def list_invoices(db=Depends(get_async_read_db)):
+    return (await db.execute(read_queries.invoices())).scalars().all()
+
+
+@router.get("/bank/transactions", response_model=list[schemas.BankTransaction])
+async def list_bank_transactions(db=Depends(get_async_read_db)):
+    return (await db.execute(read_queries.bank_transactions())).scalars().all()
+
+
+@router.get("/cashbook", response_model=list[schemas.CashbookEntry])
+async def list_cashbook_entries(db=Depends(get_async_read_db)):
+    return (await db.execute(read_queries.cashbook_entries())).scalars().all()
+
+
+# Mitglieder-Portal
+
+@router.get("/me", response_model=schemas.Member)
+async def get_me(
+    current_user: models.User = Depends(get_current_async_member_user),
+    db=Depends(get_async_read_db),
+):
+    member = (await db.execute(read_queries.member(current_user.member_id))).scalar_one_or_none()
+    if not member:
+        raise HTTPException(status_code=404, detail="Mitglied nicht gefunden")
+    return member
+
+
+@router.get("/me/parcels")
+async def get_my_parcels(
+    current_user: models.User = Depends(get_current_async_member_user),
+    db=Depends(get_async_read_db),
+):
+    contracts = (await db.execute(read_queries.member_contracts(current_user.member_id))).scalars().all()
+    return read_queries.member_parcels(contracts)
+
+
+@router.get("/me/invoices", response_model=list[schemas.Invoice])
+async def get_my_invoices(
+    current_user: models.User = Depends(get_current_async_member_user),
+    db=Depends(get_async_read_db),
+):
+    return (await db.execute(read_queries.invoices(current_user.member_id))).scalars().all()
+
+
+@router.get("/me/balance")
+async def get_my_balance(
+    current_user: models.User = Depends(get_current_async_member_user),
+    db=Depends(get_async_read_db),
+):
+    row = (await db.execute(read_queries.member_balance(current_user.member_id))).one()
+    return read_queries.balance_response(row)
+
+
+@router.get("/calendar/events", response_model=list[schemas.CalendarEvent])
+async def list_events(db=Depends(get_async_read_db)):
+    return (await db.execute(read_queries.public_events())).scalars().all()
@@ -1,14 +1,15 @@
 from datetime import datetime, timedelta
 from typing import Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 
-from .db import SessionLocal
-from . import models
+from .db import AsyncSessionLocal, SessionLocal, write_tracker
+from . import models, read_queries
+from .metrics import PASSWORD_VERIFY
 
 import os
 
@@ -28,8 +29,36 @@ def get_db():
         db.close()
 
 
+def client_key(request: Request) -> str:
+    return request.headers.get("authorization") or (
+        request.client.host if request.client else ""
+    )
+
+
+def get_read_db(request: Request):
+    # Reine Lese-Endpunkte: Replikat, außer der Client hat gerade selbst geschrieben
+    db = SessionLocal()
+    db.info["read_only"] = not write_tracker.is_sticky(
+        client_key(request), request.headers.get("x-primary-until")
+    )
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request):
+    # Nur mit ASYNC_DB (Endpunkte in async_endpoints.py)
+    async with AsyncSessionLocal() as db:
+        db.info["read_only"] = not write_tracker.is_sticky(
+            client_key(request), request.headers.get("x-primary-until")
+        )
+        yield db
+
+
 def verify_password(plain_password, password_hash):
-    return pwd_context.verify(plain_password, password_hash)
+    with PASSWORD_VERIFY.time():
+        return pwd_context.verify(plain_password, password_hash)
 
 
 def hash_password(password: str) -> str:
@@ -48,32 +77,52 @@ def get_user_by_email(db: Session, email: str) -> Optional[models.User]:
     return db.query(models.User).filter(models.User.email == email).first()
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> models.User:
-    credentials_exception = HTTPException(
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Nicht eingeloggt oder Token ungültig",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _user_id_from_token(token: str) -> int:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: int = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+        return int(payload.get("sub"))
+    except (JWTError, TypeError, ValueError):
+        raise _credentials_exception()
 
-    user = db.query(models.User).get(user_id)
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> models.User:
+    user = db.query(models.User).get(_user_id_from_token(token))
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     return user
 
 
-async def get_current_member_user(
-    current_user: models.User = Depends(get_current_user),
+def get_current_member_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_read_db),
 ) -> models.User:
+    # Gleiche Session wie der Portal-Endpunkt: eine Verbindung je Anfrage
+    user = db.execute(read_queries.user(_user_id_from_token(token))).scalar_one_or_none()
+    return _member_user(user)
+
+
+async def get_current_async_member_user(
+    token: str = Depends(oauth2_scheme),
+    db=Depends(get_async_read_db),
+) -> models.User:
+    result = await db.execute(read_queries.user(_user_id_from_token(token)))
+    return _member_user(result.scalar_one_or_none())
+
+
+def _member_user(current_user: Optional[models.User]) -> models.User:
+    if current_user is None:
+        raise _credentials_exception()
     if current_user.role != models.UserRole.MEMBER or not current_user.member_id:
         raise HTTPException(status_code=403, detail="Nur für Mitglieder zugänglich")
     return current_user
@@ -1,15 +1,19 @@
 import csv
+import time
 from io import StringIO
 from dateutil import parser
 from sqlalchemy.orm import Session
 from . import models
+from .metrics import CSV_IMPORT_DURATION, CSV_IMPORT_REJECTED, CSV_IMPORT_ROWS
 
 
 def import_bank_csv(db: Session, file_content: str, filename: str):
+    start = time.perf_counter()
     f = StringIO(file_content)
     reader = csv.DictReader(f, delimiter=';')
 
     created = 0
+    rejected = 0
     for row in reader:
         try:
             booking_date = parser.parse(row.get("Buchungstag") or row.get("Buchung"))
@@ -38,7 +42,11 @@ def import_bank_csv(db: Session, file_content: str, filename: str):
             db.add(tx)
             created += 1
         except Exception:
+            rejected += 1
             continue
 
     db.commit()
+    CSV_IMPORT_ROWS.inc(created)
+    CSV_IMPORT_REJECTED.inc(rejected)
+    CSV_IMPORT_DURATION.observe(time.perf_counter() - start)
     return created
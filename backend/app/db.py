@@ -1,12 +1,370 @@
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import threading
+import time
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker, declarative_base, Session
 
 DATABASE_URL = os.getenv(
     "DATABASE_URL",
     "postgresql+psycopg2://kleingarten:kleingarten@db:5432/kleingarten"
 )
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Lese-Replikate, kommagetrennt. Leer = alles läuft über die Primär-DB.
+DATABASE_REPLICA_URLS = [
+    url.strip()
+    for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",")
+    if url.strip()
+]
+# So lange (Sekunden) liest ein Client nach einem eigenen Schreibzugriff
+# weiter von der Primär-DB, damit er seine Änderungen sofort sieht.
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+# Abstand (Sekunden) zwischen zwei Health-Checks pro Replikat
+REPLICA_HEALTH_INTERVAL = float(os.getenv("REPLICA_HEALTH_INTERVAL", "10"))
+# Verbindungsaufbau zu einem Replikat (Sekunden); der Health-Check läuft in der Anfrage
+REPLICA_CONNECT_TIMEOUT = int(os.getenv("REPLICA_CONNECT_TIMEOUT", "2"))
+
+# Verbindungspool (gilt für synchrone und asynchrone Engines)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Abbruch langer Abfragen in Millisekunden (nur PostgreSQL), 0 = aus
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+
+# Async-Modus (asyncpg): Portal- und Listen-Endpunkte warten auf die DB, ohne
+# dabei einen Thread aus dem Threadpool zu belegen.
+ASYNC_DB = os.getenv("ASYNC_DB", "0") == "1"
+
+# SQLite-Betrieb (kleine Installationen ohne eigenen Datenbankserver)
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "2048"))
+# Höchstzahl Verbindungen je Engine; Standard ist die Größe des Threadpools (AnyIO: 40)
+SQLITE_MAX_CONNECTIONS = int(os.getenv("SQLITE_MAX_CONNECTIONS", "40"))
+# Wartezeit (Sekunden) auf die Schreibsperre, innerhalb des Prozesses und zwischen Workern
+SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", "30"))
+
+
+def is_sqlite(url) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    url = make_url(url)
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+    }
+    if url.get_backend_name() == "sqlite":
+        # Eine Anfrage hält ihre Verbindung auch zwischen Dependency und
+        # Endpunkt. Ist der Pool kleiner als der Threadpool, warten unter Last
+        # alle Threads auf Verbindungen, deren Anfragen auf einen Thread warten.
+        options["pool_size"] = min(DB_POOL_SIZE, SQLITE_MAX_CONNECTIONS)
+        options["max_overflow"] = SQLITE_MAX_CONNECTIONS - options["pool_size"]
+    if DB_STATEMENT_TIMEOUT_MS and url.get_backend_name() == "postgresql":
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
+def replica_options(url: str, is_async: bool = False) -> dict:
+    options = engine_options(url, is_async=is_async)
+    if make_url(url).get_backend_name() == "postgresql":
+        connect_args = dict(options.get("connect_args", {}))
+        connect_args["timeout" if is_async else "connect_timeout"] = REPLICA_CONNECT_TIMEOUT
+        options["connect_args"] = connect_args
+    return options
+
+
+def async_database_url(url: str) -> str:
+    """Gleiche Datenbank, asynchroner Treiber (asyncpg bzw. aiosqlite)."""
+    url = make_url(url)
+    drivers = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+    return url.set(drivername=f"{url.get_backend_name()}+{drivers[url.get_backend_name()]}") \
+        .render_as_string(hide_password=False)
+
+
+def configure_sqlite(engine):
+    """WAL und Pragmas für jede neue SQLite-Verbindung.
+
+    WAL lässt Leser parallel zum (einzigen) Schreiber laufen; mit
+    ``synchronous=NORMAL`` wird nur beim Checkpoint synchronisiert, nicht bei
+    jedem Commit. ``mmap_size`` und ``cache_size`` halten die Datenbank
+    weitgehend im Speicher.
+    """
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT * 1000)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        # Fremdschlüssel prüft SQLite nur auf Anfrage, PostgreSQL immer
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+class SingleWriterQueue:
+    """Lässt Schreibtransaktionen eines Prozesses nacheinander laufen.
+
+    SQLite erlaubt nur einen Schreiber. Statt dass parallele Anfragen auf
+    ``database is locked`` laufen, wartet jede Session vor ihrem ersten
+    Schreibzugriff, bis die vorige Schreibtransaktion beendet ist. Lesende
+    Sessions sind davon nicht betroffen.
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self._lock.acquire(timeout=self.timeout):
+            raise TimeoutError("Schreibzugriff auf die SQLite-Datenbank: Zeitüberschreitung")
+
+    def release(self):
+        self._lock.release()
+
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+write_queue = None
+if is_sqlite(DATABASE_URL):
+    configure_sqlite(engine)
+    write_queue = SingleWriterQueue(SQLITE_BUSY_TIMEOUT)
+
+
+class ReplicaSet:
+    """Verteilt Lesezugriffe reihum auf gesunde Replikate.
+
+    Ein Replikat, dessen Health-Check (``SELECT 1``) fehlschlägt, wird bis
+    zum nächsten Check übersprungen. Ist keines erreichbar, liefert
+    ``pick()`` ``None`` und der Aufrufer fällt auf die Primär-DB zurück.
+    """
+
+    def __init__(self, engines, health_interval: float):
+        self.engines = list(engines)
+        self.health_interval = health_interval
+        self._healthy = {id(e): True for e in self.engines}
+        self._checked_at = {id(e): 0.0 for e in self.engines}
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def _check(self, replica) -> bool:
+        try:
+            with replica.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return True
+        except Exception:
+            return False
+
+    def is_healthy(self, replica) -> bool:
+        key = id(replica)
+        now = time.monotonic()
+        if now - self._checked_at[key] >= self.health_interval:
+            self._checked_at[key] = now
+            self._healthy[key] = self._check(replica)
+        return self._healthy[key]
+
+    def mark_unhealthy(self, replica):
+        self._healthy[id(replica)] = False
+        self._checked_at[id(replica)] = time.monotonic()
+
+    def pick(self):
+        if not self.engines:
+            return None
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % len(self.engines)
+        for offset in range(len(self.engines)):
+            replica = self.engines[(start + offset) % len(self.engines)]
+            if self.is_healthy(replica):
+                return replica
+        return None
+
+
+replicas = ReplicaSet(
+    [create_engine(url, pool_pre_ping=True, **replica_options(url)) for url in DATABASE_REPLICA_URLS],
+    health_interval=REPLICA_HEALTH_INTERVAL,
+)
+
+
+class WriteTracker:
+    """Merkt sich pro Client, bis wann er von der Primär-DB lesen soll.
+
+    Der Zeitpunkt wird zusätzlich als Header an den Client zurückgegeben
+    (``X-Primary-Until``). Schickt der Client ihn mit, funktioniert das auch
+    über mehrere Worker-Prozesse hinweg.
+    """
+
+    MAX_ENTRIES = 10000
+
+    def __init__(self, window: float):
+        self.window = window
+        self._until = {}
+        self._lock = threading.Lock()
+
+    def mark(self, client_key: str) -> float:
+        until = time.time() + self.window
+        with self._lock:
+            if len(self._until) >= self.MAX_ENTRIES:
+                now = time.time()
+                self._until = {k: v for k, v in self._until.items() if v > now}
+            self._until[client_key] = until
+        return until
+
+    def is_sticky(self, client_key: str, until_header=None) -> bool:
+        now = time.time()
+        if until_header:
+            try:
+                if now < float(until_header) <= now + self.window:
+                    return True
+            except ValueError:
+                pass
+        return self._until.get(client_key, 0.0) > now
+
+
+write_tracker = WriteTracker(READ_YOUR_WRITES_SECONDS)
+
+
+class RoutingSession(Session):
+    """Session, die Lesezugriffe auf ein Replikat lenken kann.
+
+    Nur Sessions mit ``info["read_only"]`` lesen vom Replikat. Sobald in der
+    Session geschrieben (geflusht) wurde, bleibt sie bei der Primär-DB.
+    Scheitert eine Abfrage auf dem Replikat, wird sie auf der Primär-DB wiederholt.
+    Unter SQLite reiht sich die Session vor dem ersten Schreibzugriff in die
+    ``write_queue`` ein und verlässt sie mit dem Ende der Transaktion, bei
+    einem fehlgeschlagenen Flush oder Commit sofort mit dem Rollback.
+    """
+
+    primary = engine
+    replica_set = replicas
+    write_queue = write_queue
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or (clause is not None and clause.is_dml):
+            self.info["wrote"] = True
+            if self.write_queue is not None and not self.info.get("writing"):
+                # Erst die Verbindung, dann die Warteschlange: so wartet der
+                # Schreiber nie auf den Pool, den wartende Sessions belegen
+                self.connection(bind_arguments={"bind": self.primary})
+                self.write_queue.acquire()
+                self.info["writing"] = True
+            return self.primary
+        if self.info.get("read_only") and not self.info.get("wrote"):
+            replica = self.info.get("replica")
+            if replica is None:
+                replica = self.replica_set.pick()
+                if replica is None:
+                    return self.primary
+                self.info["replica"] = replica
+            return replica
+        return self.primary
+
+    def execute(self, statement, *args, **kw):
+        try:
+            return super().execute(statement, *args, **kw)
+        except OperationalError:
+            # Replikat fällt zwischen zwei Health-Checks aus: abmelden, einmal auf der Primär-DB versuchen
+            replica = self.info.get("replica")
+            if replica is None or self.info.get("wrote"):
+                raise
+            self.replica_set.mark_unhealthy(replica)
+            self.rollback()
+            self.info["read_only"] = False
+            del self.info["replica"]
+            return super().execute(statement, *args, **kw)
+
+    def commit(self):
+        try:
+            super().commit()
+        except Exception:
+            # Nicht erst beim Schließen der Session zurückrollen, sonst warten alle übrigen Schreiber
+            if self.info.get("writing"):
+                self.rollback()
+            raise
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _leave_write_queue(session, transaction):
+    if transaction.parent is None and session.info.pop("writing", False):
+        session.write_queue.release()
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _leave_write_queue_after_rollback(session):
+    # Ein fehlgeschlagener Flush rollt die DB-Transaktion sofort zurück, die
+    # Session-Transaktion endet aber erst mit rollback() oder close()
+    if session.info.pop("writing", False):
+        session.write_queue.release()
+
+
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=engine, class_=RoutingSession
+)
+
+async_engine = None
+async_replicas = None
+AsyncSessionLocal = None
+
+if ASYNC_DB:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(
+        async_database_url(DATABASE_URL), **engine_options(DATABASE_URL, is_async=True)
+    )
+    if is_sqlite(DATABASE_URL):
+        configure_sqlite(async_engine.sync_engine)
+    # get_bind läuft innerhalb der AsyncSession synchron, daher die sync_engine-Fassaden
+    async_replicas = ReplicaSet(
+        [
+            create_async_engine(
+                async_database_url(url), pool_pre_ping=True, **replica_options(url, is_async=True)
+            ).sync_engine
+            for url in DATABASE_REPLICA_URLS
+        ],
+        health_interval=REPLICA_HEALTH_INTERVAL,
+    )
+
+    class AsyncRoutingSession(RoutingSession):
+        # Async-Endpunkte lesen nur; eine blockierende Warteschlange hätte im Event-Loop nichts verloren
+        primary = async_engine.sync_engine
+        replica_set = async_replicas
+        write_queue = None
+
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        sync_session_class=AsyncRoutingSession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+
+def upsert(table, values, conflict_columns, update_columns=()):
+    """``INSERT ... ON CONFLICT`` für PostgreSQL und SQLite.
+
+    Ohne ``update_columns`` wird eine vorhandene Zeile unverändert gelassen.
+    """
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif engine.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"upsert für {engine.dialect.name} nicht unterstützt")
+    stmt = insert(table).values(values)
+    if update_columns:
+        return stmt.on_conflict_do_update(
+            index_elements=conflict_columns,
+            set_={column: stmt.excluded[column] for column in update_columns},
+        )
+    return stmt.on_conflict_do_nothing(index_elements=conflict_columns)
+
+
 Base = declarative_base()
@@ -0,0 +1,208 @@
+"""Mahnlauf: überfällige Rechnungen mahnen, Gebühren buchen, Mahnungen einreihen.
+
+Gedacht für den nächtlichen Lauf (``python -m app.dunning``) oder über
+``POST /dunning/run``. Alle Schritte sind mengenbasiert: ein UPDATE, das die
+fälligen Rechnungen über den Teilindex auf offene Rechnungen auswählt, und
+zwei Bulk-INSERTs.
+"""
+import os
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import bindparam, case, func, insert, literal_column, or_, select, update
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Gebühr je Mahnstufe (1. Mahnung, 2. Mahnung, ...), die Anzahl bestimmt die höchste Stufe
+DUNNING_FEES = [
+    Decimal(fee.strip())
+    for fee in os.getenv("DUNNING_FEES", "0,5,10").split(",")
+    if fee.strip()
+]
+# Mindestabstand in Tagen zwischen Fälligkeit bzw. zwei Mahnungen
+DUNNING_INTERVAL_DAYS = int(os.getenv("DUNNING_INTERVAL_DAYS", "14"))
+# Versand: nach so vielen Fehlversuchen wird eine Mahnung nicht mehr versucht,
+# dazwischen wächst die Pause ab NOTIFICATION_RETRY_MINUTES jeweils auf das Doppelte
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", "5"))
+NOTIFICATION_RETRY_MINUTES = int(os.getenv("NOTIFICATION_RETRY_MINUTES", "60"))
+
+NOTIFICATION_KIND = "dunning"
+
+
+def overdue_invoices_query(today: date, interval_days: int = DUNNING_INTERVAL_DAYS, max_level: Optional[int] = None):
+    """Zu mahnende Rechnungen samt Restbetrag aus zugeordneten Zahlungen."""
+    max_level = len(DUNNING_FEES) if max_level is None else max_level
+    cutoff = today - timedelta(days=interval_days)
+    invoice = models.Invoice.__table__
+    tx = models.BankTransaction.__table__
+    paid = func.coalesce(func.sum(tx.c.amount), 0)
+    remaining = (invoice.c.total_amount - paid).label("remaining")
+    return (
+        select(
+            invoice.c.id,
+            invoice.c.member_id,
+            invoice.c.dunning_level,
+            invoice.c.due_date,
+            remaining,
+        )
+        .select_from(invoice.outerjoin(tx, tx.c.matched_invoice_id == invoice.c.id))
+        .where(
+            # entspricht dem Prädikat von ix_invoices_open_due_date; als Literale, denn
+            # gegen gebundene Parameter prüft SQLite das Prädikat des Teilindex nicht
+            invoice.c.status.in_(bindparam(
+                "open_statuses", models.OPEN_INVOICE_STATUSES, expanding=True, literal_execute=True
+            )),
+            invoice.c.due_date < cutoff,
+            invoice.c.dunning_level < max_level,
+            or_(invoice.c.last_dunned_at.is_(None), invoice.c.last_dunned_at <= cutoff),
+        )
+        .group_by(invoice.c.id, invoice.c.member_id, invoice.c.dunning_level,
+                  invoice.c.due_date, invoice.c.total_amount)
+        .having(remaining > 0)
+    )
+
+
+def run_dunning(db: Session, today: Optional[date] = None, interval_days: int = DUNNING_INTERVAL_DAYS):
+    """Führt einen Mahnlauf aus und gibt eine Zusammenfassung zurück."""
+    today = today or date.today()
+    cutoff = today - timedelta(days=interval_days)
+    invoice = models.Invoice.__table__
+    tx = models.BankTransaction.__table__
+
+    due = overdue_invoices_query(today, interval_days).subquery("due")
+    fee_for_new_level = case(
+        *[(invoice.c.dunning_level == level, fee) for level, fee in enumerate(DUNNING_FEES)],
+        else_=0,
+    )
+    # SQLite gibt Spalten im RETURNING unqualifiziert aus, ``id`` wäre dort bank_transactions.id
+    paid = (
+        select(func.coalesce(func.sum(tx.c.amount), 0))
+        .where(tx.c.matched_invoice_id == literal_column(f"{invoice.name}.id"))
+        .scalar_subquery()
+    )
+    # Bedingungen wiederholen: ein parallel laufender Mahnlauf mahnt nicht doppelt
+    result = db.execute(
+        update(invoice)
+        .where(
+            invoice.c.id.in_(select(due.c.id)),
+            invoice.c.dunning_level < len(DUNNING_FEES),
+            or_(invoice.c.last_dunned_at.is_(None), invoice.c.last_dunned_at <= cutoff),
+        )
+        .values(
+            total_amount=invoice.c.total_amount + fee_for_new_level,
+            dunning_level=invoice.c.dunning_level + 1,
+            last_dunned_at=today,
+        )
+        # total_amount ist hier schon inklusive Gebühr
+        .returning(
+            invoice.c.id,
+            invoice.c.member_id,
+            invoice.c.due_date,
+            invoice.c.dunning_level,
+            (invoice.c.total_amount - paid).label("remaining"),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    dunned = result.all()
+
+    now = datetime.utcnow()
+    items, notifications, by_level = [], [], {}
+    fees_total = Decimal("0")
+    for row in dunned:
+        level = row.dunning_level
+        fee = DUNNING_FEES[level - 1]
+        by_level[level] = by_level.get(level, 0) + 1
+        if fee:
+            fees_total += fee
+            items.append({
+                "invoice_id": row.id,
+                "description": f"Mahngebühr ({level}. Mahnung)",
+                "amount": fee,
+            })
+        notifications.append({
+            "member_id": row.member_id,
+            "invoice_id": row.id,
+            "kind": NOTIFICATION_KIND,
+            "payload": {
+                "level": level,
+                "due_date": row.due_date.isoformat(),
+                "remaining": str(row.remaining),
+                "fee": str(fee),
+            },
+            "created_at": now,
+        })
+
+    if items:
+        db.execute(insert(models.InvoiceItem.__table__), items)
+    if notifications:
+        db.execute(insert(models.Notification.__table__), notifications)
+    db.commit()
+
+    return {
+        "dunned": len(dunned),
+        "fees_total": fees_total,
+        "notifications": len(notifications),
+        "by_level": by_level,
+    }
+
+
+def send_pending_notifications(db: Session, limit: int = 500):
+    """Verschickt eingereihte Mahnungen per E-Mail.
+
+    Fehlgeschlagene Mahnungen werden mit Fehler und Zeitpunkt des nächsten
+    Versuchs vermerkt, damit sie nicht dauerhaft die Spitze des Stapels belegen.
+    """
+    from .email_utils import send_dunning_email
+
+    now = datetime.utcnow()
+    pending = (
+        db.query(models.Notification, models.Member.email)
+        .join(models.Member, models.Member.id == models.Notification.member_id)
+        .filter(
+            models.Notification.sent_at.is_(None),
+            models.Notification.kind == NOTIFICATION_KIND,
+            # ohne Adresse nie versendbar, sonst blockieren sie die Spitze jedes Stapels
+            models.Member.email.isnot(None),
+            models.Member.email != "",
+            models.Notification.attempts < NOTIFICATION_MAX_ATTEMPTS,
+            or_(models.Notification.next_attempt_at.is_(None), models.Notification.next_attempt_at <= now),
+        )
+        .order_by(models.Notification.created_at)
+        .limit(limit)
+        .all()
+    )
+    sent = 0
+    for notification, email in pending:
+        try:
+            send_dunning_email(email, notification.invoice_id, notification.payload)
+        except Exception as exc:
+            print("Mahnung konnte nicht verschickt werden:", email, exc)
+            notification.attempts += 1
+            notification.last_error = str(exc)[:1000]
+            notification.next_attempt_at = datetime.utcnow() + timedelta(
+                minutes=NOTIFICATION_RETRY_MINUTES * 2 ** (notification.attempts - 1)
+            )
+            db.commit()
+            continue
+        notification.sent_at = datetime.utcnow()
+        db.commit()
+        sent += 1
+    return sent
+
+
+def main():
+    from .db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        summary = run_dunning(db)
+        print("Mahnlauf:", summary)
+        print("Verschickt:", send_pending_notifications(db))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
 import os
 import smtplib
+import time
 from email.message import EmailMessage
 
+from .metrics import EMAIL_FAILURES, EMAIL_SEND
+
 SMTP_HOST = os.getenv("SMTP_HOST")
 SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
 SMTP_USER = os.getenv("SMTP_USER")
@@ -36,7 +39,56 @@ Dein Kleingartenverein
 """
     )
 
-    with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-        server.starttls()
-        server.login(SMTP_USER, SMTP_PASS)
-        server.send_message(msg)
+    start = time.perf_counter()
+    try:
+        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
+            server.starttls()
+            server.login(SMTP_USER, SMTP_PASS)
+            server.send_message(msg)
+    except Exception:
+        EMAIL_FAILURES.labels("invite").inc()
+        raise
+    finally:
+        EMAIL_SEND.labels("invite").observe(time.perf_counter() - start)
+
+
+def send_dunning_email(to_email: str, invoice_id: int, payload: dict):
+    level = payload.get("level")
+    if not all([SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASS, SMTP_FROM]):
+        print(f"SMTP nicht konfiguriert. Würde {level}. Mahnung zu Rechnung {invoice_id} schicken an:", to_email)
+        return
+
+    msg = EmailMessage()
+    msg["Subject"] = f"{level}. Mahnung zu Rechnung {invoice_id}"
+    msg["From"] = SMTP_FROM
+    msg["To"] = to_email
+
+    fee_line = ""
+    if payload.get("fee") and payload["fee"] not in ("0", "0.00"):
+        fee_line = f"Für diese Mahnung wird eine Gebühr von {payload['fee']} EUR berechnet.\n"
+
+    msg.set_content(
+        f"""Hallo,
+
+für die Rechnung {invoice_id} (fällig am {payload.get('due_date')}) ist noch ein
+Betrag von {payload.get('remaining')} EUR offen.
+{fee_line}
+Bitte überweise den offenen Betrag zeitnah. Falls du bereits bezahlt hast,
+betrachte diese Nachricht als gegenstandslos.
+
+Viele Grüße
+Dein Kleingartenverein
+"""
+    )
+
+    start = time.perf_counter()
+    try:
+        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
+            server.starttls()
+            server.login(SMTP_USER, SMTP_PASS)
+            server.send_message(msg)
+    except Exception:
+        EMAIL_FAILURES.labels("dunning").inc()
+        raise
+    finally:
+        EMAIL_SEND.labels("dunning").observe(time.perf_counter() - start)
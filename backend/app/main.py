@@ -1,13 +1,19 @@
-from fastapi import FastAPI, Depends, UploadFile, File, HTTPException
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import Optional
+
+from fastapi import FastAPI, Depends, UploadFile, File, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 
-from .db import Base, engine, SessionLocal
-from . import models, schemas, csv_import
+from .db import engine, SessionLocal, replicas, write_tracker, async_engine, async_replicas, upsert, ASYNC_DB
+from . import models, schemas, csv_import, metrics, migrate, dunning, occupancy, read_queries, async_endpoints
 from .auth import (
     get_db,
+    get_read_db,
+    client_key,
     get_current_user,
     get_current_member_user,
     create_access_token,
@@ -17,10 +23,52 @@ from .auth import (
 from .email_utils import send_invite_email
 
 import secrets
+import time
+
+metrics.instrument_engine(engine, "primary")
+for i, replica in enumerate(replicas.engines):
+    metrics.instrument_engine(replica, f"replica{i}")
+if async_engine is not None:
+    # Pool-Events hängen an der synchronen Fassade der Async-Engine
+    metrics.instrument_engine(async_engine.sync_engine, "primary_async")
+    for i, replica in enumerate(async_replicas.engines):
+        metrics.instrument_engine(replica, f"replica{i}_async")
+
+
+def create_initial_admin():
+    db = SessionLocal()
+    try:
+        admin_exists = db.query(models.User).filter(models.User.role == models.UserRole.ADMIN).first()
+        if not admin_exists:
+            # Ein anderer Worker kann schneller sein, dann bleibt dessen Admin bestehen
+            result = db.execute(upsert(
+                models.User.__table__,
+                {
+                    "email": "admin@example.com",
+                    "password_hash": hash_password("admin123"),
+                    "role": models.UserRole.ADMIN,
+                    "member_id": None,
+                },
+                conflict_columns=["email"],
+            ))
+            db.commit()
+            if result.rowcount:
+                print("Initialer Admin erstellt: admin@example.com / admin123")
+    finally:
+        db.close()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Kein DB-Zugriff beim Import: Worker starten schnell, die DB darf noch hochfahren
+    migrate.wait_for_database()
+    migrate.check_schema()
+    create_initial_admin()
+    yield
+    metrics.mark_process_dead()
 
-Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="Kleingarten-Verwaltung")
+app = FastAPI(title="Kleingarten-Verwaltung", lifespan=lifespan)
 
 origins = ["*"]  # für Entwicklung, später einschränken
 
@@ -30,28 +78,47 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Primary-Until"],
 )
 
 
-def create_initial_admin():
-    db = SessionLocal()
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    response = await call_next(request)
+    # Nach einem Schreibzugriff liest der Client eine Weile von der Primär-DB
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        until = write_tracker.mark(client_key(request))
+        response.headers["X-Primary-Until"] = f"{until:.3f}"
+    return response
+
+
+@app.middleware("http")
+async def collect_http_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status_code = 500
     try:
-        admin_exists = db.query(models.User).filter(models.User.role == models.UserRole.ADMIN).first()
-        if not admin_exists:
-            user = models.User(
-                email="admin@example.com",
-                password_hash=hash_password("admin123"),
-                role=models.UserRole.ADMIN,
-                member_id=None,
-            )
-            db.add(user)
-            db.commit()
-            print("Initialer Admin erstellt: admin@example.com / admin123")
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
     finally:
-        db.close()
+        # Routen-Template statt konkretem Pfad, damit /members/1, /members/2 ... eine Serie bleiben
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        metrics.HTTP_LATENCY.labels(request.method, path).observe(time.perf_counter() - start)
+        metrics.HTTP_REQUESTS.labels(request.method, path, str(status_code)).inc()
+
 
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    data, content_type = metrics.render_metrics()
+    return Response(content=data, media_type=content_type)
 
-create_initial_admin()
+
+def sync_read(path: str, **kwargs):
+    """Synchroner Lese-Endpunkt; mit ASYNC_DB gilt stattdessen die Variante aus async_endpoints."""
+    if ASYNC_DB:
+        return lambda endpoint: endpoint
+    return app.get(path, **kwargs)
 
 
 # Auth
@@ -69,7 +136,7 @@ def login(
     if not verify_password(form_data.password, user.password_hash):
         raise HTTPException(status_code=400, detail="Falsche Zugangsdaten")
 
-    token = create_access_token({"sub": user.id})
+    token = create_access_token({"sub": str(user.id)})  # JWT verlangt "sub" als String
     return {"access_token": token, "token_type": "bearer"}
 
 
@@ -84,9 +151,9 @@ def create_member(member: schemas.MemberCreate, db: Session = Depends(get_db)):
     return m
 
 
-@app.get("/members", response_model=list[schemas.Member])
-def list_members(db: Session = Depends(get_db)):
-    return db.query(models.Member).all()
+@sync_read("/members", response_model=list[schemas.Member])
+def list_members(db: Session = Depends(get_read_db)):
+    return db.execute(read_queries.members()).scalars().all()
 
 
 # Parzellen & Verträge (einfach)
@@ -100,23 +167,64 @@ def create_parcel(parcel: schemas.ParcelCreate, db: Session = Depends(get_db)):
     return p
 
 
-@app.get("/parcels", response_model=list[schemas.Parcel])
-def list_parcels(db: Session = Depends(get_db)):
-    return db.query(models.Parcel).all()
+@sync_read("/parcels", response_model=list[schemas.Parcel])
+def list_parcels(db: Session = Depends(get_read_db)):
+    return db.execute(read_queries.parcels()).scalars().all()
+
+
+@app.get("/parcels/vacant", response_model=list[schemas.Parcel])
+def list_vacant_parcels(on: Optional[date] = None, db: Session = Depends(get_read_db)):
+    return occupancy.vacant_parcels(db, on or date.today())
+
+
+@app.get("/parcels/waiting-list", response_model=list[schemas.WaitingListEntry])
+def get_waiting_list_allocation(
+    on: Optional[date] = None,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    if current_user.role != models.UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Nur für Admins")
+
+    return occupancy.waiting_list_allocation(db, on or date.today())
+
+
+@app.get("/parcels/{parcel_id}/occupancy", response_model=list[schemas.OccupancyPeriod])
+def get_parcel_occupancy(
+    parcel_id: int,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    # enthält Namen der Pächter, wie die Warteliste nur für Admins
+    if current_user.role != models.UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Nur für Admins")
+
+    if db.query(models.Parcel.id).filter(models.Parcel.id == parcel_id).first() is None:
+        raise HTTPException(status_code=404, detail="Parzelle nicht gefunden")
+    return occupancy.parcel_occupancy(db, parcel_id)
 
 
 @app.post("/contracts", response_model=schemas.Contract)
 def create_contract(contract: schemas.ContractCreate, db: Session = Depends(get_db)):
+    if contract.end_date and contract.end_date < contract.start_date:
+        raise HTTPException(status_code=400, detail="Vertragsende liegt vor Vertragsbeginn")
+
     c = models.Contract(**contract.dict())
     db.add(c)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError as exc:
+        db.rollback()
+        if occupancy.is_overlap_violation(exc):
+            raise HTTPException(status_code=409, detail="Parzelle ist in diesem Zeitraum bereits verpachtet")
+        raise HTTPException(status_code=400, detail="Mitglied oder Parzelle existiert nicht")
     db.refresh(c)
     return c
 
 
-@app.get("/contracts", response_model=list[schemas.Contract])
-def list_contracts(db: Session = Depends(get_db)):
-    return db.query(models.Contract).all()
+@sync_read("/contracts", response_model=list[schemas.Contract])
+def list_contracts(db: Session = Depends(get_read_db)):
+    return db.execute(read_queries.contracts()).scalars().all()
 
 
 # Rechnungen (einfacher Endpunkt)
@@ -148,23 +256,38 @@ def create_invoice(data: schemas.InvoiceCreate, db: Session = Depends(get_db)):
     return invoice
 
 
-@app.get("/invoices", response_model=list[schemas.Invoice])
-def list_invoices(db: Session = Depends(get_db)):
-    return db.query(models.Invoice).all()
+@sync_read("/invoices", response_model=list[schemas.Invoice])
+def list_invoices(db: Session = Depends(get_read_db)):
+    return db.execute(read_queries.invoices()).scalars().all()
+
+
+# Mahnlauf (nächtlich per `python -m app.dunning`, hier für Admins manuell)
+
+@app.post("/dunning/run", response_model=schemas.DunningRunResult)
+def run_dunning(
+    run_date: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    if current_user.role != models.UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Nur für Admins")
+
+    return dunning.run_dunning(db, today=run_date)
 
 
 # CSV-Import Bank
 
 @app.post("/bank/import")
-async def import_bank_file(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    content = (await file.read()).decode("utf-8", errors="ignore")
+def import_bank_file(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    # Synchron im Threadpool: das Warten auf die SQLite-Schreibwarteschlange blockiert nicht den Event-Loop
+    content = file.file.read().decode("utf-8", errors="ignore")
     created = csv_import.import_bank_csv(db, content, filename=file.filename)
     return {"imported": created}
 
 
-@app.get("/bank/transactions", response_model=list[schemas.BankTransaction])
-def list_bank_transactions(db: Session = Depends(get_db)):
-    return db.query(models.BankTransaction).order_by(models.BankTransaction.booking_date.desc()).all()
+@sync_read("/bank/transactions", response_model=list[schemas.BankTransaction])
+def list_bank_transactions(db: Session = Depends(get_read_db)):
+    return db.execute(read_queries.bank_transactions()).scalars().all()
 
 
 # Kassenbuch
@@ -178,9 +301,9 @@ def create_cashbook_entry(entry: schemas.CashbookEntryCreate, db: Session = Depe
     return e
 
 
-@app.get("/cashbook", response_model=list[schemas.CashbookEntry])
-def list_cashbook_entries(db: Session = Depends(get_db)):
-    return db.query(models.CashbookEntry).order_by(models.CashbookEntry.date.desc()).all()
+@sync_read("/cashbook", response_model=list[schemas.CashbookEntry])
+def list_cashbook_entries(db: Session = Depends(get_read_db)):
+    return db.execute(read_queries.cashbook_entries()).scalars().all()
 
 
 # Mitglieder einladen (Zugangsdaten mailen)
@@ -218,80 +341,41 @@ def invite_member(
 
 # Mitglieder-Portal: eigene Daten
 
-@app.get("/me", response_model=schemas.Member)
+@sync_read("/me", response_model=schemas.Member)
 def get_me(
     current_user: models.User = Depends(get_current_member_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
-    member = db.query(models.Member).get(current_user.member_id)
+    member = db.execute(read_queries.member(current_user.member_id)).scalar_one_or_none()
     if not member:
         raise HTTPException(status_code=404, detail="Mitglied nicht gefunden")
     return member
 
 
-@app.get("/me/parcels")
+@sync_read("/me/parcels")
 def get_my_parcels(
     current_user: models.User = Depends(get_current_member_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
-    contracts = (
-        db.query(models.Contract)
-        .filter(models.Contract.member_id == current_user.member_id)
-        .all()
-    )
-    result = []
-    for c in contracts:
-        result.append({
-            "contract_id": c.id,
-            "parcel_id": c.parcel.id,
-            "parcel_number": c.parcel.number,
-            "size_sqm": str(c.parcel.size_sqm) if c.parcel.size_sqm else None,
-            "status": c.status.value,
-            "start_date": c.start_date,
-            "end_date": c.end_date,
-            "yearly_rent": str(c.yearly_rent),
-            "yearly_additional": str(c.yearly_additional),
-        })
-    return result
-
-
-@app.get("/me/invoices", response_model=list[schemas.Invoice])
+    contracts = db.execute(read_queries.member_contracts(current_user.member_id)).scalars().all()
+    return read_queries.member_parcels(contracts)
+
+
+@sync_read("/me/invoices", response_model=list[schemas.Invoice])
 def get_my_invoices(
     current_user: models.User = Depends(get_current_member_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
-    invoices = (
-        db.query(models.Invoice)
-        .filter(models.Invoice.member_id == current_user.member_id)
-        .all()
-    )
-    return invoices
+    return db.execute(read_queries.invoices(current_user.member_id)).scalars().all()
 
 
-@app.get("/me/balance")
+@sync_read("/me/balance")
 def get_my_balance(
     current_user: models.User = Depends(get_current_member_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
-    member_id = current_user.member_id
-
-    total_invoices = (
-        db.query(func.coalesce(func.sum(models.Invoice.total_amount), 0))
-        .filter(
-            models.Invoice.member_id == member_id,
-            models.Invoice.status != models.InvoiceStatus.CANCELLED
-        )
-        .scalar()
-    )
-
-    total_bank = (
-        db.query(func.coalesce(func.sum(models.BankTransaction.amount), 0))
-        .filter(models.BankTransaction.matched_member_id == member_id)
-        .scalar()
-    )
-
-    balance = float(total_bank - total_invoices)
-    return {"balance": balance, "total_invoices": float(total_invoices), "total_payments": float(total_bank)}
+    row = db.execute(read_queries.member_balance(current_user.member_id)).one()
+    return read_queries.balance_response(row)
 
 
 # Kalender
@@ -312,11 +396,10 @@ def create_event(
     return e
 
 
-@app.get("/calendar/events", response_model=list[schemas.CalendarEvent])
-def list_events(db: Session = Depends(get_db)):
-    return (
-        db.query(models.CalendarEvent)
-        .filter(models.CalendarEvent.is_public == True)
-        .order_by(models.CalendarEvent.start.asc())
-        .all()
-    )
+@sync_read("/calendar/events", response_model=list[schemas.CalendarEvent])
+def list_events(db: Session = Depends(get_read_db)):
+    return db.execute(read_queries.public_events()).scalars().all()
+
+
+if ASYNC_DB:
+    app.include_router(async_endpoints.router)
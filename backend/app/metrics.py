@@ -0,0 +1,153 @@
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+
+# Bei mehreren uvicorn-Workern muss PROMETHEUS_MULTIPROC_DIR gesetzt sein
+# (leeres, beschreibbares Verzeichnis), sonst sieht /metrics nur den
+# Worker, der die Anfrage gerade beantwortet.
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+if MULTIPROC_DIR:
+    # Auch für Einmal-Befehle (z. B. `python -m app.dunning`), die nicht über das CMD des Images starten
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+
+# HTTP
+
+HTTP_REQUESTS = Counter(
+    "kgv_http_requests_total",
+    "HTTP-Anfragen nach Route und Statuscode",
+    ["method", "route", "status"],
+)
+HTTP_LATENCY = Histogram(
+    "kgv_http_request_duration_seconds",
+    "Antwortzeit pro Route",
+    ["method", "route"],
+)
+
+
+# Datenbank-Pool
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "kgv_db_pool_checked_out",
+    "Aktuell ausgeliehene DB-Verbindungen",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "kgv_db_pool_overflow",
+    "Verbindungen über pool_size hinaus",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAIT = Histogram(
+    "kgv_db_pool_wait_seconds",
+    "Wartezeit beim Ausleihen einer DB-Verbindung",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+DB_POOL_TIMEOUTS = Counter(
+    "kgv_db_pool_timeouts_total",
+    "Fehlgeschlagene Verbindungsanforderungen (Timeout, DB nicht erreichbar)",
+    ["engine"],
+)
+
+
+# Auth
+
+PASSWORD_VERIFY = Histogram(
+    "kgv_password_verify_seconds",
+    "Dauer der bcrypt-Passwortprüfung",
+    buckets=(0.01, 0.05, 0.1, 0.2, 0.3, 0.5, 1, 2),
+)
+
+
+# CSV-Import
+
+CSV_IMPORT_ROWS = Counter(
+    "kgv_csv_import_rows_total",
+    "Importierte Kontoauszugszeilen (rate() = Zeilen/Sekunde)",
+)
+CSV_IMPORT_REJECTED = Counter(
+    "kgv_csv_import_rejected_rows_total",
+    "Verworfene Kontoauszugszeilen",
+)
+CSV_IMPORT_DURATION = Histogram(
+    "kgv_csv_import_duration_seconds",
+    "Dauer eines kompletten CSV-Imports",
+    buckets=(0.05, 0.1, 0.5, 1, 2, 5, 10, 30, 60),
+)
+
+
+# E-Mail
+
+EMAIL_SEND = Histogram(
+    "kgv_email_send_seconds",
+    "Dauer des E-Mail-Versands",
+    ["kind"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+EMAIL_FAILURES = Counter(
+    "kgv_email_failures_total",
+    "Fehlgeschlagene E-Mails",
+    ["kind"],
+)
+
+
+def instrument_engine(engine, name: str):
+    pool = engine.pool
+    checked_out = DB_POOL_CHECKED_OUT.labels(name)
+    overflow = DB_POOL_OVERFLOW.labels(name)
+    wait = DB_POOL_WAIT.labels(name)
+    timeouts = DB_POOL_TIMEOUTS.labels(name)
+
+    def update_overflow():
+        if hasattr(pool, "overflow"):
+            overflow.set(max(pool.overflow(), 0))
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_conn, conn_record, conn_proxy):
+        checked_out.inc()
+        update_overflow()
+
+    @event.listens_for(pool, "checkin")
+    def on_checkin(dbapi_conn, conn_record):
+        checked_out.dec()
+        update_overflow()
+
+    # Wartezeit: SQLAlchemy hat dafür kein Event, daher Pool.connect umhüllen
+    original_connect = pool.connect
+
+    def timed_connect():
+        start = time.perf_counter()
+        try:
+            return original_connect()
+        except Exception:
+            timeouts.inc()
+            raise
+        finally:
+            wait.observe(time.perf_counter() - start)
+
+    pool.connect = timed_connect
+
+
+def render_metrics():
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead():
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
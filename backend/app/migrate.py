@@ -0,0 +1,117 @@
+"""Schema-Migrationen (Alembic) und Schema-Prüfung beim Start.
+
+Migrationen laufen einmalig als eigener Schritt vor dem Start der Worker:
+
+    python -m app.migrate
+"""
+import os
+import time
+from pathlib import Path
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from .db import engine
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+# Muss bei jeder neuen Migration auf deren Revision gesetzt werden. Die
+# Worker vergleichen beim Start nur diese Konstante mit alembic_version,
+# statt Alembic zu laden und das Migrationsverzeichnis zu lesen.
+SCHEMA_VERSION = "0004"
+# Revision, die dem Stand vor Einführung der Migrationen entspricht
+BASELINE_REVISION = "0001"
+
+DB_CONNECT_RETRIES = int(os.getenv("DB_CONNECT_RETRIES", "10"))
+DB_CONNECT_BACKOFF = float(os.getenv("DB_CONNECT_BACKOFF", "0.5"))
+DB_CONNECT_BACKOFF_MAX = 10.0
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+def wait_for_database(bind=engine, retries: int = DB_CONNECT_RETRIES, backoff: float = DB_CONNECT_BACKOFF):
+    """Verbindet sich mit der DB, bei Fehlern mit exponentiellem Backoff."""
+    delay = backoff
+    for attempt in range(1, retries + 1):
+        try:
+            with bind.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return
+        except OperationalError:
+            if attempt == retries:
+                raise
+            print(f"Datenbank nicht erreichbar (Versuch {attempt}/{retries}), neuer Versuch in {delay:.1f} s")
+            time.sleep(delay)
+            delay = min(delay * 2, DB_CONNECT_BACKOFF_MAX)
+
+
+def current_version(bind=engine):
+    try:
+        with bind.connect() as conn:
+            return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except (OperationalError, ProgrammingError):
+        # Tabelle fehlt: Datenbank wurde noch nie migriert
+        return None
+
+
+def check_schema(bind=engine):
+    version = current_version(bind)
+    if version != SCHEMA_VERSION:
+        raise SchemaVersionError(
+            f"Datenbankschema ist auf Version {version}, erwartet wird {SCHEMA_VERSION}. "
+            "Bitte zuerst `python -m app.migrate` ausführen."
+        )
+
+
+def alembic_config(configure_logging: bool = False):
+    from alembic.config import Config
+
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["configure_logging"] = configure_logging
+    return config
+
+
+def upgrade(bind=engine, revision: str = "head", configure_logging: bool = False):
+    from alembic import command
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    config = alembic_config(configure_logging)
+    head = ScriptDirectory.from_config(config).get_current_head()
+    if head != SCHEMA_VERSION:
+        raise SchemaVersionError(
+            f"app.migrate.SCHEMA_VERSION ({SCHEMA_VERSION}) passt nicht zur neuesten Migration ({head})"
+        )
+
+    with bind.connect() as conn:
+        sqlite = conn.dialect.name == "sqlite"
+        if sqlite:
+            # Batch-Migrationen bauen Tabellen neu auf (DROP TABLE), das scheitert an
+            # referenzierenden Zeilen; das Pragma wirkt nur außerhalb einer Transaktion
+            conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+            conn.commit()
+        try:
+            with conn.begin():
+                config.attributes["connection"] = conn
+                current = MigrationContext.configure(conn).get_current_revision()
+                if current is None and inspect(conn).has_table("users"):
+                    # Schema wurde früher per create_all angelegt
+                    print(f"Bestehendes Schema ohne Versionstabelle, setze auf Revision {BASELINE_REVISION}")
+                    command.stamp(config, BASELINE_REVISION)
+                command.upgrade(config, revision)
+        finally:
+            if sqlite:
+                conn.exec_driver_sql("PRAGMA foreign_keys=ON")
+                conn.commit()
+
+
+def main():
+    wait_for_database()
+    upgrade(configure_logging=True)
+    print("Datenbankschema ist auf Version", current_version())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 import enum
 from sqlalchemy import (
     Column, Integer, String, Date, Boolean, ForeignKey,
-    Numeric, Text, Enum, JSON, DateTime
+    Numeric, Text, Enum, JSON, DateTime, Index, CheckConstraint
 )
 from sqlalchemy.orm import relationship
 from .db import Base
@@ -65,6 +65,12 @@ class Parcel(Base):
 
 class Contract(Base):
     __tablename__ = "contracts"
+    # Überschneidungsfreiheit je Parzelle: siehe Migration 0003 (PostgreSQL:
+    # Exclusion-Constraint auf daterange, SQLite: Trigger)
+    __table_args__ = (
+        CheckConstraint("end_date IS NULL OR end_date >= start_date", name="ck_contracts_period"),
+        Index("ix_contracts_parcel_start", "parcel_id", "start_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     member_id = Column(Integer, ForeignKey("members.id"), nullable=False)
@@ -91,6 +97,8 @@ class Invoice(Base):
     due_date = Column(Date, nullable=True)
     total_amount = Column(Numeric(10, 2), nullable=False)
     status = Column(Enum(InvoiceStatus), default=InvoiceStatus.OPEN)
+    dunning_level = Column(Integer, nullable=False, default=0, server_default="0")
+    last_dunned_at = Column(Date, nullable=True)
 
     member = relationship("Member", back_populates="invoices")
     contract = relationship("Contract", back_populates="invoices")
@@ -99,6 +107,16 @@ class Invoice(Base):
     cashbook_entries = relationship("CashbookEntry", back_populates="invoice")
 
 
+# Nur offene Rechnungen nach Fälligkeit, Grundlage des Mahnlaufs
+OPEN_INVOICE_STATUSES = (InvoiceStatus.OPEN, InvoiceStatus.PARTIAL)
+Index(
+    "ix_invoices_open_due_date",
+    Invoice.due_date,
+    postgresql_where=Invoice.status.in_(OPEN_INVOICE_STATUSES),
+    sqlite_where=Invoice.status.in_(OPEN_INVOICE_STATUSES),
+)
+
+
 class InvoiceItem(Base):
     __tablename__ = "invoice_items"
 
@@ -124,7 +142,7 @@ class BankTransaction(Base):
     raw_data = Column(JSON, nullable=True)
     import_filename = Column(String(255), nullable=True)
 
-    matched_invoice_id = Column(Integer, ForeignKey("invoices.id"), nullable=True)
+    matched_invoice_id = Column(Integer, ForeignKey("invoices.id"), nullable=True, index=True)
     matched_member_id = Column(Integer, ForeignKey("members.id"), nullable=True)
 
     matched_invoice = relationship("Invoice", back_populates="bank_transactions")
@@ -165,3 +183,31 @@ class CalendarEvent(Base):
     end = Column(DateTime, nullable=True)
     description = Column(Text, nullable=True)
     is_public = Column(Boolean, default=True)
+
+
+class Notification(Base):
+    """Ausgehende Benachrichtigung (z. B. Mahnung), wird später per E-Mail verschickt."""
+    __tablename__ = "notifications"
+
+    id = Column(Integer, primary_key=True, index=True)
+    member_id = Column(Integer, ForeignKey("members.id"), nullable=False)
+    invoice_id = Column(Integer, ForeignKey("invoices.id"), nullable=True)
+    kind = Column(String(50), nullable=False)
+    payload = Column(JSON, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    sent_at = Column(DateTime, nullable=True)
+    # Fehlgeschlagene Versandversuche; der nächste Versuch erst ab next_attempt_at
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime, nullable=True)
+
+    member = relationship("Member")
+    invoice = relationship("Invoice")
+
+
+Index(
+    "ix_notifications_pending",
+    Notification.created_at,
+    postgresql_where=Notification.sent_at.is_(None),
+    sqlite_where=Notification.sent_at.is_(None),
+)
@@ -0,0 +1,199 @@
+"""Belegung der Parzellen über die Vertragszeiträume.
+
+Ein Vertrag belegt seine Parzelle von ``start_date`` bis einschließlich
+``end_date`` (offen, wenn ``end_date`` leer ist). Auf PostgreSQL werden die
+Zeiträume als ``daterange`` verglichen, damit der GiST-Index des
+Exclusion-Constraints greift; sonst als Datumsvergleich über
+``ix_contracts_parcel_start``.
+"""
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import Boolean, exists, func, literal, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ColumnElement
+from sqlalchemy.sql.visitors import InternalTraversal
+
+from . import models
+
+
+class PeriodOverlaps(ColumnElement):
+    """``[start, end]`` eines Vertrags überschneidet ``[lower, upper]``; ``None`` = offen."""
+
+    type = Boolean()
+    inherit_cache = True
+    _traverse_internals = [
+        ("start", InternalTraversal.dp_clauseelement),
+        ("end", InternalTraversal.dp_clauseelement),
+        ("lower", InternalTraversal.dp_clauseelement),
+        ("upper", InternalTraversal.dp_clauseelement),
+    ]
+
+    def __init__(self, start, end, lower, upper=None):
+        self.start = start
+        self.end = end
+        self.lower = literal(lower)
+        self.upper = literal(upper, type_=start.type) if upper is not None else None
+
+
+@compiles(PeriodOverlaps)
+def _compile_overlaps(element, compiler, **kw):
+    start = compiler.process(element.start, **kw)
+    end = compiler.process(element.end, **kw)
+    lower = compiler.process(element.lower, **kw)
+    clause = f"({end} IS NULL OR {end} >= {lower})"
+    if element.upper is not None:
+        clause = f"({start} <= {compiler.process(element.upper, **kw)} AND {clause})"
+    return clause
+
+
+@compiles(PeriodOverlaps, "postgresql")
+def _compile_overlaps_pg(element, compiler, **kw):
+    # Ausdruck muss exakt dem des Exclusion-Constraints entsprechen
+    start = compiler.process(element.start, **kw)
+    end = compiler.process(element.end, **kw)
+    lower = compiler.process(element.lower, **kw)
+    upper = compiler.process(element.upper, **kw) if element.upper is not None else "NULL"
+    return f"daterange({start}, {end}, '[]') && daterange({lower}, {upper}, '[]')"
+
+
+def is_overlap_violation(exc) -> bool:
+    """IntegrityError stammt vom Überschneidungsschutz (Constraint bzw. Trigger ``contracts_no_overlap``)."""
+    orig = getattr(exc, "orig", None)
+    return getattr(orig, "pgcode", None) == "23P01" or "contracts_no_overlap" in str(orig)
+
+
+def contract_overlaps(lower: date, upper: Optional[date] = None):
+    return PeriodOverlaps(models.Contract.start_date, models.Contract.end_date, lower, upper)
+
+
+def _parcel_occupied(lower: date, upper: Optional[date]):
+    return exists().where(
+        models.Contract.parcel_id == models.Parcel.id,
+        contract_overlaps(lower, upper),
+    )
+
+
+def vacant_parcels(db: Session, on: date):
+    """Aktive Parzellen ohne Vertrag am Stichtag."""
+    return (
+        db.query(models.Parcel)
+        .filter(models.Parcel.is_active == True, ~_parcel_occupied(on, on))  # noqa: E712
+        .order_by(models.Parcel.number)
+        .all()
+    )
+
+
+def parcel_occupancy(db: Session, parcel_id: int):
+    """Zeitstrahl einer Parzelle: Verträge in zeitlicher Folge, dazwischen Leerstand."""
+    rows = (
+        db.query(
+            models.Contract.id,
+            models.Contract.member_id,
+            models.Contract.start_date,
+            models.Contract.end_date,
+            models.Contract.status,
+            models.Member.first_name,
+            models.Member.last_name,
+        )
+        .join(models.Member, models.Member.id == models.Contract.member_id)
+        .filter(models.Contract.parcel_id == parcel_id)
+        .order_by(models.Contract.start_date)
+        .all()
+    )
+    periods = []
+    previous_end = None
+    for row in rows:
+        if previous_end is not None and row.start_date > previous_end + timedelta(days=1):
+            periods.append({
+                "kind": "vacant",
+                "start_date": previous_end + timedelta(days=1),
+                "end_date": row.start_date - timedelta(days=1),
+            })
+        periods.append({
+            "kind": "contract",
+            "start_date": row.start_date,
+            "end_date": row.end_date,
+            "contract_id": row.id,
+            "member_id": row.member_id,
+            "member_name": f"{row.first_name} {row.last_name}",
+            "status": row.status,
+        })
+        previous_end = row.end_date
+        if previous_end is None:
+            break
+    if previous_end is not None:
+        periods.append({
+            "kind": "vacant",
+            "start_date": previous_end + timedelta(days=1),
+            "end_date": None,
+        })
+    return periods
+
+
+def waiting_list_allocation(db: Session, on: date):
+    """Freie Parzellen ab Stichtag, der Reihe nach den wartenden Mitgliedern zugeordnet.
+
+    Frei ist eine Parzelle ohne laufenden oder künftigen Vertrag; wartend ist
+    ein aktives Mitglied ohne solchen Vertrag, in der Reihenfolge ``member_since``.
+    """
+    parcel_rank = func.row_number().over(order_by=models.Parcel.number)
+    free = (
+        select(
+            models.Parcel.id.label("parcel_id"),
+            models.Parcel.number.label("parcel_number"),
+            models.Parcel.size_sqm.label("size_sqm"),
+            parcel_rank.label("position"),
+        )
+        .where(models.Parcel.is_active == True, ~_parcel_occupied(on, None))  # noqa: E712
+        .cte("free_parcels")
+    )
+
+    member_has_contract = exists().where(
+        models.Contract.member_id == models.Member.id,
+        contract_overlaps(on, None),
+    )
+    member_rank = func.row_number().over(
+        order_by=(models.Member.member_since.is_(None), models.Member.member_since, models.Member.id)
+    )
+    waiting = (
+        select(
+            models.Member.id.label("member_id"),
+            models.Member.first_name.label("first_name"),
+            models.Member.last_name.label("last_name"),
+            models.Member.member_since.label("member_since"),
+            member_rank.label("position"),
+        )
+        .where(models.Member.is_active == True, ~member_has_contract)  # noqa: E712
+        .cte("waiting_members")
+    )
+
+    # FULL OUTER JOIN: auch Parzellen ohne Bewerber und Bewerber ohne Parzelle
+    position = func.coalesce(free.c.position, waiting.c.position)
+    query = (
+        select(
+            position.label("position"),
+            free.c.parcel_id,
+            free.c.parcel_number,
+            free.c.size_sqm,
+            waiting.c.member_id,
+            waiting.c.first_name,
+            waiting.c.last_name,
+            waiting.c.member_since,
+        )
+        .select_from(free.join(waiting, free.c.position == waiting.c.position, full=True))
+        .order_by(position)
+    )
+    return [
+        {
+            "position": row.position,
+            "parcel_id": row.parcel_id,
+            "parcel_number": row.parcel_number,
+            "size_sqm": row.size_sqm,
+            "member_id": row.member_id,
+            "member_name": f"{row.first_name} {row.last_name}" if row.member_id else None,
+            "member_since": row.member_since,
+        }
+        for row in db.execute(query)
+    ]
@@ -0,0 +1,105 @@
+"""Abfragen der Listen- und Portal-Endpunkte.
+
+Gemeinsam für die synchronen Endpunkte in main.py und die asynchronen in
+async_endpoints.py; die Endpunkte führen nur noch aus. Beziehungen, die in
+der Antwort stehen, werden vorab geladen (mit AsyncSession gibt es kein
+Lazy Loading, synchron wären es N+1 Abfragen).
+"""
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import joinedload, selectinload
+
+from . import models
+
+
+def user(user_id: int):
+    return select(models.User).where(models.User.id == user_id)
+
+
+def members():
+    return select(models.Member)
+
+
+def member(member_id: int):
+    return select(models.Member).where(models.Member.id == member_id)
+
+
+def parcels():
+    return select(models.Parcel)
+
+
+def contracts():
+    return select(models.Contract)
+
+
+def invoices(member_id: Optional[int] = None):
+    query = select(models.Invoice).options(selectinload(models.Invoice.items))
+    if member_id is not None:
+        query = query.where(models.Invoice.member_id == member_id)
+    return query
+
+
+def bank_transactions():
+    return select(models.BankTransaction).order_by(models.BankTransaction.booking_date.desc())
+
+
+def cashbook_entries():
+    return select(models.CashbookEntry).order_by(models.CashbookEntry.date.desc())
+
+
+def public_events():
+    return (
+        select(models.CalendarEvent)
+        .where(models.CalendarEvent.is_public == True)  # noqa: E712
+        .order_by(models.CalendarEvent.start.asc())
+    )
+
+
+def member_contracts(member_id: int):
+    return (
+        select(models.Contract)
+        .options(joinedload(models.Contract.parcel))
+        .where(models.Contract.member_id == member_id)
+    )
+
+
+def member_parcels(contracts):
+    """Antwort von /me/parcels aus den Verträgen samt Parzelle."""
+    return [
+        {
+            "contract_id": c.id,
+            "parcel_id": c.parcel.id,
+            "parcel_number": c.parcel.number,
+            "size_sqm": str(c.parcel.size_sqm) if c.parcel.size_sqm else None,
+            "status": c.status.value,
+            "start_date": c.start_date,
+            "end_date": c.end_date,
+            "yearly_rent": str(c.yearly_rent),
+            "yearly_additional": str(c.yearly_additional),
+        }
+        for c in contracts
+    ]
+
+
+def member_balance(member_id: int):
+    """Summe der Rechnungen und der zugeordneten Zahlungen in einer Abfrage."""
+    total_invoices = (
+        select(func.coalesce(func.sum(models.Invoice.total_amount), 0))
+        .where(
+            models.Invoice.member_id == member_id,
+            models.Invoice.status != models.InvoiceStatus.CANCELLED
+        )
+        .scalar_subquery()
+    )
+    total_bank = (
+        select(func.coalesce(func.sum(models.BankTransaction.amount), 0))
+        .where(models.BankTransaction.matched_member_id == member_id)
+        .scalar_subquery()
+    )
+    return select(total_invoices.label("total_invoices"), total_bank.label("total_bank"))
+
+
+def balance_response(row):
+    balance = float(row.total_bank - row.total_invoices)
+    return {"balance": balance, "total_invoices": float(row.total_invoices), "total_payments": float(row.total_bank)}
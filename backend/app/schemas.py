@@ -1,6 +1,6 @@
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Optional, List
+from typing import Optional, List, Dict
 
 from pydantic import BaseModel
 
@@ -96,6 +96,8 @@ class InvoiceCreate(InvoiceBase):
 
 class Invoice(InvoiceBase):
     id: int
+    dunning_level: int = 0
+    last_dunned_at: Optional[date] = None
     items: List[InvoiceItemBase] = []
 
     class Config:
@@ -139,6 +141,37 @@ class CashbookEntry(CashbookEntryBase):
         orm_mode = True
 
 
+# Belegung
+
+class OccupancyPeriod(BaseModel):
+    kind: str  # "contract" oder "vacant"
+    start_date: date
+    end_date: Optional[date] = None
+    contract_id: Optional[int] = None
+    member_id: Optional[int] = None
+    member_name: Optional[str] = None
+    status: Optional[ContractStatus] = None
+
+
+class WaitingListEntry(BaseModel):
+    position: int
+    parcel_id: Optional[int] = None
+    parcel_number: Optional[str] = None
+    size_sqm: Optional[Decimal] = None
+    member_id: Optional[int] = None
+    member_name: Optional[str] = None
+    member_since: Optional[date] = None
+
+
+# Mahnlauf
+
+class DunningRunResult(BaseModel):
+    dunned: int
+    fees_total: Decimal
+    notifications: int
+    by_level: Dict[int, int]
+
+
 # Auth / User
 
 class Token(BaseModel):
@@ -0,0 +1,46 @@
+"""Zwei Ergebnisdateien (run_bench / loadtest) vergleichen.
+
+    python -m bench.compare vorher.json nachher.json
+"""
+import argparse
+import json
+
+METRICS = ["p50_ms", "p95_ms", "rows_per_s", "requests_per_s"]
+
+
+def compare(before: dict, after: dict):
+    rows = []
+    for name in sorted(set(before["results"]) | set(after["results"])):
+        old = before["results"].get(name, {})
+        new = after["results"].get(name, {})
+        for metric in METRICS:
+            if metric not in old and metric not in new:
+                continue
+            a, b = old.get(metric), new.get(metric)
+            change = (b - a) / a * 100 if a and b is not None else None
+            rows.append((name, metric, a, b, change))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args()
+
+    with open(args.before, encoding="utf-8") as f:
+        before = json.load(f)
+    with open(args.after, encoding="utf-8") as f:
+        after = json.load(f)
+
+    print(f"vorher:  {before['meta'].get('git_revision')} {before['meta'].get('timestamp')}")
+    print(f"nachher: {after['meta'].get('git_revision')} {after['meta'].get('timestamp')}")
+    for name, metric, a, b, change in compare(before, after):
+        a_text = f"{a:10.2f}" if a is not None else "         -"
+        b_text = f"{b:10.2f}" if b is not None else "         -"
+        change_text = f"{change:+7.1f} %" if change is not None else ""
+        print(f"{name:40s} {metric:15s} {a_text} {b_text} {change_text}")
+
+
+if __name__ == "__main__":
+    main()
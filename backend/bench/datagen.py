@@ -0,0 +1,365 @@
+"""Deterministischer Testdaten-Generator für einen Kleingartenverein.
+
+Skalierung 1 entspricht einem kleinen Verein (60 Parzellen), Skalierung 100
+dem Hundertfachen. Gleicher Seed + gleiche Skalierung = gleiche Daten.
+
+    cd backend
+    DATABASE_URL=sqlite:///./bench.db python -m bench.datagen --scale 1 --csv-dir bench_csv
+"""
+import argparse
+import csv
+import os
+import random
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from sqlalchemy import insert, text
+
+from app import migrate, models
+from app.auth import hash_password
+from app.db import Base, engine
+
+PARCELS_PER_SCALE = 60
+YEARS = 5
+MEMBER_PASSWORD = "bench123"
+# Stichtag der erzeugten Daten (Rechnungen bis einschließlich dieses Jahres)
+TODAY = date(2025, 6, 30)
+
+FIRST_NAMES = [
+    "Anna", "Bernd", "Claudia", "Dieter", "Elke", "Frank", "Gisela", "Heinz",
+    "Ingrid", "Jürgen", "Karin", "Lars", "Monika", "Norbert", "Olga", "Peter",
+    "Renate", "Stefan", "Ursula", "Werner",
+]
+LAST_NAMES = [
+    "Müller", "Schmidt", "Schneider", "Fischer", "Weber", "Meyer", "Wagner",
+    "Becker", "Schulz", "Hoffmann", "Koch", "Richter", "Klein", "Wolf",
+    "Schröder", "Neumann", "Schwarz", "Braun", "Zimmermann", "Krüger",
+]
+CITIES = [("04109", "Leipzig"), ("01067", "Dresden"), ("09111", "Chemnitz")]
+CASHBOOK_CATEGORIES = {
+    models.CashbookType.INCOME: ["Pacht", "Spende", "Vereinsfest", "Getränke"],
+    models.CashbookType.EXPENSE: ["Wasser", "Strom", "Versicherung", "Werkzeug", "Müll"],
+}
+
+# Spaltennamen der Kontoauszüge verschiedener Banken (siehe csv_import.py)
+BANK_DIALECTS = {
+    "sparkasse": {
+        "columns": ["Buchungstag", "Wertstellung", "Verwendungszweck",
+                    "Begünstigter/Zahlungspflichtiger", "IBAN", "Betrag"],
+        "date_format": "%d.%m.%y",
+    },
+    "volksbank": {
+        "columns": ["Buchung", "Valuta", "Name", "Verwendungszweck", "IBAN",
+                    "Umsatz", "Saldo"],
+        "date_format": "%d.%m.%Y",
+    },
+    "dkb": {
+        "columns": ["Buchungstag", "Wertstellung", "Name", "Verwendungszweck",
+                    "IBAN", "Betrag", "Kontostand"],
+        "date_format": "%Y-%m-%d",
+    },
+}
+BANK_COLUMN_FIELDS = {
+    "Buchungstag": "date", "Buchung": "date", "Wertstellung": "date", "Valuta": "date",
+    "Name": "name", "Begünstigter/Zahlungspflichtiger": "name",
+    "Verwendungszweck": "purpose", "IBAN": "iban",
+    "Betrag": "amount", "Umsatz": "amount",
+    "Saldo": "balance", "Kontostand": "balance",
+}
+
+
+@dataclass
+class GeneratedCounts:
+    members: int = 0
+    parcels: int = 0
+    contracts: int = 0
+    invoices: int = 0
+    invoice_items: int = 0
+    bank_transactions: int = 0
+    cashbook_entries: int = 0
+    users: int = 0
+    calendar_events: int = 0
+
+
+def _iban(rng: random.Random) -> str:
+    return "DE" + "".join(str(rng.randint(0, 9)) for _ in range(20))
+
+
+def _money(value) -> Decimal:
+    return Decimal(value).quantize(Decimal("0.01"))
+
+
+def _german_amount(amount: Decimal) -> str:
+    # 1234.50 -> "1.234,50"
+    text = f"{amount:,.2f}"
+    return text.replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def _chunked_insert(conn, table, rows, size=5000):
+    for i in range(0, len(rows), size):
+        conn.execute(insert(table), rows[i:i + size])
+
+
+def generate(scale: int = 1, seed: int = 42, bind=None, today: date = TODAY):
+    """Füllt eine leere Datenbank und gibt die Anzahl je Tabelle zurück."""
+    bind = bind or engine
+    rng = random.Random(seed)
+    migrate.upgrade(bind)
+    counts = GeneratedCounts()
+
+    n_parcels = PARCELS_PER_SCALE * scale
+    first_year = today.year - YEARS + 1
+
+    parcels = []
+    for i in range(n_parcels):
+        parcels.append({
+            "id": i + 1,
+            "number": f"{i // 100 + 1}-{i % 100 + 1:03d}",
+            "size_sqm": _money(rng.randint(200, 450)),
+            "description": None,
+            "is_active": True,
+        })
+
+    # Jede Parzelle hat 1-2 Pächter im Zeitraum; der erste hat evtl. gekündigt
+    members, contracts = [], []
+    member_id = contract_id = 0
+    for parcel in parcels:
+        # spätestens im Vorjahr, damit ein Pächterwechsel nie vor Vertragsbeginn liegt
+        start = date(first_year - rng.randint(1, 15), rng.randint(1, 12), 1)
+        change_year = first_year + rng.randint(0, YEARS) if rng.random() < 0.25 else None
+        tenancies = []
+        if change_year and change_year <= today.year:
+            tenancies.append((start, date(change_year - 1, 12, 31), models.ContractStatus.ENDED))
+            tenancies.append((date(change_year, 1, 1), None, models.ContractStatus.ACTIVE))
+        else:
+            tenancies.append((start, None, models.ContractStatus.ACTIVE))
+
+        for start_date, end_date, status in tenancies:
+            member_id += 1
+            contract_id += 1
+            zip_code, city = rng.choice(CITIES)
+            members.append({
+                "id": member_id,
+                "first_name": rng.choice(FIRST_NAMES),
+                "last_name": rng.choice(LAST_NAMES),
+                "email": f"mitglied{member_id}@example.org",
+                "phone": f"0341 {rng.randint(100000, 999999)}",
+                "street": f"Gartenweg {rng.randint(1, 200)}",
+                "zip_code": zip_code,
+                "city": city,
+                "iban": _iban(rng),
+                "bic": "WELADE8LXXX",
+                "member_since": start_date,
+                "is_active": end_date is None,
+            })
+            size = parcel["size_sqm"]
+            contracts.append({
+                "id": contract_id,
+                "member_id": member_id,
+                "parcel_id": parcel["id"],
+                "start_date": start_date,
+                "end_date": end_date,
+                "status": status,
+                "yearly_rent": _money(size * Decimal("0.35")),
+                "yearly_additional": _money(rng.choice([40, 55, 70])),
+            })
+
+    # Jahresrechnungen je Vertrag, dazu passende Zahlungen
+    invoices, items, transactions = [], [], []
+    invoice_id = item_id = tx_id = 0
+    members_by_id = {m["id"]: m for m in members}
+    for contract in contracts:
+        member = members_by_id[contract["member_id"]]
+        for year in range(first_year, today.year + 1):
+            if contract["start_date"].year > year:
+                continue
+            if contract["end_date"] and contract["end_date"].year < year:
+                continue
+            invoice_id += 1
+            invoice_date = date(year, 3, 1)
+            due_date = date(year, 4, 15)
+            lines = [
+                ("Pacht", contract["yearly_rent"]),
+                ("Umlagen (Wasser, Strom, Versicherung)", contract["yearly_additional"]),
+                ("Mitgliedsbeitrag", _money(48)),
+            ]
+            if rng.random() < 0.2:
+                lines.append(("Arbeitsstunden nicht geleistet", _money(rng.choice([15, 30, 45]))))
+            total = _money(sum(amount for _, amount in lines))
+            for description, amount in lines:
+                item_id += 1
+                items.append({
+                    "id": item_id,
+                    "invoice_id": invoice_id,
+                    "description": description,
+                    "amount": amount,
+                })
+
+            roll = rng.random()
+            if due_date > today or roll < 0.08:
+                status, paid = models.InvoiceStatus.OPEN, Decimal("0")
+            elif roll < 0.15:
+                status, paid = models.InvoiceStatus.PARTIAL, _money(total / 2)
+            elif roll < 0.17:
+                status, paid = models.InvoiceStatus.CANCELLED, Decimal("0")
+            else:
+                status, paid = models.InvoiceStatus.PAID, total
+
+            invoices.append({
+                "id": invoice_id,
+                "member_id": member["id"],
+                "contract_id": contract["id"],
+                "year": year,
+                "invoice_date": invoice_date,
+                "due_date": due_date,
+                "total_amount": total,
+                "status": status,
+            })
+            if paid:
+                tx_id += 1
+                booking = due_date - timedelta(days=rng.randint(-20, 30))
+                transactions.append({
+                    "id": tx_id,
+                    "booking_date": booking,
+                    "value_date": booking,
+                    "amount": paid,
+                    "balance": None,
+                    "purpose": f"Pacht {year} Parzelle {contract['parcel_id']} RE{invoice_id}",
+                    "counterparty_name": f"{member['first_name']} {member['last_name']}",
+                    "counterparty_iban": member["iban"],
+                    "raw_data": None,
+                    "import_filename": "datagen",
+                    "matched_invoice_id": invoice_id,
+                    "matched_member_id": member["id"],
+                })
+
+    cashbook = []
+    for i in range(40 * scale * YEARS):
+        entry_type = models.CashbookType.INCOME if rng.random() < 0.4 else models.CashbookType.EXPENSE
+        cashbook.append({
+            "id": i + 1,
+            "date": date(rng.randint(first_year, today.year), rng.randint(1, 12), rng.randint(1, 28)),
+            "type": entry_type,
+            "category": rng.choice(CASHBOOK_CATEGORIES[entry_type]),
+            "description": None,
+            "amount": _money(rng.randint(500, 50000) / 100),
+            "invoice_id": None,
+        })
+
+    events = []
+    for year in range(first_year, today.year + 2):
+        for month, title in [(4, "Frühjahrsputz"), (6, "Sommerfest"), (10, "Mitgliederversammlung")]:
+            events.append({
+                "title": title,
+                "start": datetime(year, month, 15, 10, 0),
+                "end": datetime(year, month, 15, 14, 0),
+                "description": None,
+                "is_public": True,
+            })
+
+    # Ein bcrypt-Hash für alle Mitglieder-Logins, sonst dauert Skalierung 100 ewig
+    password_hash = hash_password(MEMBER_PASSWORD)
+    users = [
+        {
+            "email": m["email"],
+            "password_hash": password_hash,
+            "role": models.UserRole.MEMBER,
+            "member_id": m["id"],
+        }
+        for m in members if m["is_active"]
+    ]
+
+    with bind.begin() as conn:
+        _chunked_insert(conn, models.Parcel.__table__, parcels)
+        _chunked_insert(conn, models.Member.__table__, members)
+        _chunked_insert(conn, models.Contract.__table__, contracts)
+        _chunked_insert(conn, models.Invoice.__table__, invoices)
+        _chunked_insert(conn, models.InvoiceItem.__table__, items)
+        _chunked_insert(conn, models.BankTransaction.__table__, transactions)
+        _chunked_insert(conn, models.CashbookEntry.__table__, cashbook)
+        _chunked_insert(conn, models.User.__table__, users)
+        _chunked_insert(conn, models.CalendarEvent.__table__, events)
+        if conn.dialect.name == "postgresql":
+            # IDs wurden explizit vergeben, Sequenzen nachziehen
+            for table in Base.metadata.sorted_tables:
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                    f"COALESCE((SELECT MAX(id) FROM {table.name}), 1))"
+                ))
+
+    counts.parcels = len(parcels)
+    counts.members = len(members)
+    counts.contracts = len(contracts)
+    counts.invoices = len(invoices)
+    counts.invoice_items = len(items)
+    counts.bank_transactions = len(transactions)
+    counts.cashbook_entries = len(cashbook)
+    counts.users = len(users)
+    counts.calendar_events = len(events)
+    return counts
+
+
+def bank_csv(dialect: str, rows: int, seed: int = 42, reject_ratio: float = 0.02) -> str:
+    """Kontoauszug als CSV-Text im Format der angegebenen Bank.
+
+    ``reject_ratio`` der Zeilen sind absichtlich kaputt (fehlendes Datum),
+    damit auch der Fehlerpfad des Imports gemessen wird.
+    """
+    spec = BANK_DIALECTS[dialect]
+    rng = random.Random(f"{seed}-{dialect}")
+    columns = spec["columns"]
+    out = StringIO()
+    writer = csv.writer(out, delimiter=";", lineterminator="\n")
+    writer.writerow(columns)
+    balance = Decimal("5000.00")
+    day = date(2025, 1, 1)
+    for i in range(rows):
+        day += timedelta(days=rng.randint(0, 1))
+        amount = _money(rng.randint(-30000, 60000) / 100)
+        balance += amount
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        values = {
+            "date": day.strftime(spec["date_format"]),
+            "name": name,
+            "purpose": f"Pacht {day.year} Parzelle {rng.randint(1, 600)}",
+            "iban": _iban(rng),
+            "amount": _german_amount(amount),
+            "balance": _german_amount(balance),
+        }
+        if rng.random() < reject_ratio:
+            values["date"] = ""
+        writer.writerow([values[BANK_COLUMN_FIELDS[c]] for c in columns])
+    return out.getvalue()
+
+
+def write_bank_csvs(directory: str, rows: int, seed: int = 42):
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for dialect in BANK_DIALECTS:
+        path = os.path.join(directory, f"{dialect}.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(bank_csv(dialect, rows, seed=seed))
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--csv-dir", help="Kontoauszüge (alle Bank-Formate) hierhin schreiben")
+    parser.add_argument("--csv-rows", type=int, default=None,
+                        help="Zeilen je Kontoauszug (Standard: 500 x scale)")
+    args = parser.parse_args()
+
+    counts = generate(scale=args.scale, seed=args.seed)
+    print(counts)
+    if args.csv_dir:
+        for path in write_bank_csvs(args.csv_dir, args.csv_rows or 500 * args.scale, seed=args.seed):
+            print("geschrieben:", path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""HTTP-Lasttest gegen einen laufenden Server.
+
+Spielt eine Mischung aus Mitgliederportal- und Admin-Verkehr ab. Die
+Datenbank sollte vorher mit bench.datagen befüllt worden sein:
+
+    cd backend
+    DATABASE_URL=sqlite:///./bench.db python -m bench.datagen --scale 10
+    DATABASE_URL=sqlite:///./bench.db uvicorn app.main:app --workers 1 &
+    python -m bench.loadtest --base-url http://localhost:8000 --users 50 --duration 60
+
+Mit SQLite nur ein Worker (die Schreib-Warteschlange gilt je Prozess); für
+mehrere Worker eine PostgreSQL-URL verwenden.
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import defaultdict
+
+import httpx
+
+from . import datagen
+from .results import metadata, save, summarize
+
+# Was das Frontend beim Öffnen des Mitgliederportals parallel lädt
+PORTAL_PAGE = ["/me", "/me/parcels", "/me/invoices", "/me/balance", "/calendar/events"]
+ADMIN_PAGES = [
+    ("/members", 3),
+    ("/parcels", 2),
+    ("/contracts", 2),
+    ("/invoices", 2),
+    ("/bank/transactions", 2),
+    ("/cashbook", 1),
+]
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def request(self, client, method, path, name=None, **kwargs):
+        name = name or f"{method} {path}"
+        start = time.perf_counter()
+        try:
+            res = await client.request(method, path, **kwargs)
+        except httpx.HTTPError:
+            self.errors[name] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - start)
+        if res.status_code >= 400:
+            self.errors[name] += 1
+        return res
+
+
+async def login(client, stats, email, password):
+    res = await stats.request(
+        client, "POST", "/auth/login", name="POST /auth/login",
+        data={"username": email, "password": password},
+    )
+    if res is None or res.status_code != 200:
+        return None
+    return {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+
+async def member_user(client, stats, rng, email, deadline, think):
+    headers = await login(client, stats, email, datagen.MEMBER_PASSWORD)
+    if headers is None:
+        return
+    while time.monotonic() < deadline:
+        await asyncio.gather(*[
+            stats.request(client, "GET", path, headers=headers) for path in PORTAL_PAGE
+        ])
+        await asyncio.sleep(rng.uniform(0, 2 * think))
+
+
+async def admin_user(client, stats, rng, deadline, think, csv_content):
+    headers = await login(client, stats, "admin@example.com", "admin123")
+    if headers is None:
+        return
+    paths = [path for path, weight in ADMIN_PAGES for _ in range(weight)]
+    while time.monotonic() < deadline:
+        if csv_content and rng.random() < 0.02:
+            await stats.request(
+                client, "POST", "/bank/import", headers=headers,
+                files={"file": ("loadtest.csv", csv_content, "text/csv")},
+            )
+        else:
+            await stats.request(client, "GET", rng.choice(paths), headers=headers)
+        await asyncio.sleep(rng.uniform(0, 2 * think))
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    stats = Stats()
+    limits = httpx.Limits(max_connections=args.users * len(PORTAL_PAGE))
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        admin = await login(client, stats, "admin@example.com", "admin123")
+        if admin is None:
+            raise SystemExit("Admin-Login fehlgeschlagen")
+        members = (await client.get("/members", headers=admin)).json()
+        emails = [m["email"] for m in members if m["is_active"] and m["email"]]
+        if not emails:
+            raise SystemExit("Keine Mitglieder gefunden, vorher bench.datagen ausführen")
+        stats = Stats()
+
+        n_admins = max(1, round(args.users * args.admin_ratio))
+        csv_content = datagen.bank_csv("volksbank", args.import_rows) if args.import_rows else None
+        deadline = time.monotonic() + args.duration
+        tasks = [
+            admin_user(client, stats, random.Random(rng.random()), deadline, args.think, csv_content)
+            for _ in range(n_admins)
+        ]
+        tasks += [
+            member_user(client, stats, random.Random(rng.random()), rng.choice(emails), deadline, args.think)
+            for _ in range(args.users - n_admins)
+        ]
+        start = time.monotonic()
+        await asyncio.gather(*tasks)
+        elapsed = time.monotonic() - start
+
+    results = {}
+    for name in sorted(set(stats.latencies) | set(stats.errors)):
+        result = summarize(stats.latencies[name])
+        result["errors"] = stats.errors[name]
+        result["requests_per_s"] = len(stats.latencies[name]) / elapsed
+        results[name] = result
+    total = sum(len(v) for v in stats.latencies.values())
+    results["total"] = summarize([x for v in stats.latencies.values() for x in v])
+    results["total"]["errors"] = sum(stats.errors.values())
+    results["total"]["requests_per_s"] = total / elapsed
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=20, help="gleichzeitige virtuelle Nutzer")
+    parser.add_argument("--admin-ratio", type=float, default=0.1, help="Anteil Admin-Nutzer")
+    parser.add_argument("--duration", type=float, default=30, help="Sekunden")
+    parser.add_argument("--think", type=float, default=1.0, help="mittlere Pause zwischen Aktionen (s)")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--import-rows", type=int, default=200,
+                        help="Zeilen je gelegentlichem CSV-Import der Admins (0 = keine Importe)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="loadtest-results.json")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    meta = metadata(
+        kind="loadtest", base_url=args.base_url, users=args.users,
+        admin_ratio=args.admin_ratio, duration=args.duration, think=args.think,
+    )
+    save(args.out, meta, results)
+    for name, result in results.items():
+        print(f"{name:32s} n={result.get('count', 0):6d} err={result['errors']:4d} "
+              f"p50={result.get('p50_ms', 0):8.1f} ms p95={result.get('p95_ms', 0):8.1f} ms "
+              f"{result['requests_per_s']:7.1f} req/s")
+    print("Ergebnisse:", args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Gemeinsames Ergebnisformat für Benchmarks und Lasttests (JSON)."""
+import json
+import os
+import platform
+import statistics
+import subprocess
+from datetime import datetime, timezone
+
+
+def summarize(latencies):
+    """Kennzahlen einer Liste von Laufzeiten in Sekunden, Ausgabe in ms."""
+    if not latencies:
+        return {"count": 0}
+    ordered = sorted(latencies)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def metadata(**extra):
+    meta = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "database_url": _redact(os.getenv("DATABASE_URL", "")),
+    }
+    meta.update(extra)
+    return meta
+
+
+def _redact(url: str) -> str:
+    # Passwort aus der URL entfernen
+    if "@" in url and "://" in url:
+        scheme, rest = url.split("://", 1)
+        credentials, host = rest.rsplit("@", 1)
+        user = credentials.split(":", 1)[0]
+        return f"{scheme}://{user}:***@{host}"
+    return url
+
+
+def save(path: str, meta: dict, results: dict):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2, sort_keys=True)
+        f.write("\n")
@@ -0,0 +1,167 @@
+"""Benchmarks: CSV-Import, Listen-/Portal-Endpunkte, Kontostand-Berechnung.
+
+Läuft im Prozess gegen die Datenbank aus DATABASE_URL, die vorher leer sein
+sollte (die Daten erzeugt der Benchmark selbst über bench.datagen):
+
+    cd backend
+    rm -f bench.db
+    DATABASE_URL=sqlite:///./bench.db python -m bench.run_bench --scale 1 --out bench-results.json
+"""
+import argparse
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from app import csv_import, dunning, models
+from app.db import SessionLocal
+from app.main import app, get_my_balance
+
+from . import datagen
+from .results import metadata, save, summarize
+
+ADMIN_ENDPOINTS = [
+    "/members",
+    "/parcels",
+    "/contracts",
+    "/invoices",
+    "/bank/transactions",
+    "/cashbook",
+    "/parcels/vacant",
+    "/parcels/waiting-list",
+    "/parcels/1/occupancy",
+]
+PORTAL_ENDPOINTS = [
+    "/me",
+    "/me/parcels",
+    "/me/invoices",
+    "/me/balance",
+    "/calendar/events",
+]
+
+
+def _login(client, email, password):
+    res = client.post("/auth/login", data={"username": email, "password": password})
+    res.raise_for_status()
+    return {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+
+def _time_get(client, path, headers, iterations):
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        res = client.get(path, headers=headers)
+        latencies.append(time.perf_counter() - start)
+        res.raise_for_status()
+    return summarize(latencies)
+
+
+def bench_endpoints(client, iterations):
+    results = {}
+    admin = _login(client, "admin@example.com", "admin123")
+    for path in ADMIN_ENDPOINTS:
+        results[f"endpoint GET {path}"] = _time_get(client, path, admin, iterations)
+
+    db = SessionLocal()
+    try:
+        user = db.query(models.User).filter(models.User.role == models.UserRole.MEMBER).first()
+        email = user.email
+    finally:
+        db.close()
+    member = _login(client, email, datagen.MEMBER_PASSWORD)
+    for path in PORTAL_ENDPOINTS:
+        results[f"portal GET {path}"] = _time_get(client, path, member, iterations * 5)
+    return results
+
+
+def bench_balances():
+    """Kontostand für alle Mitglieder nacheinander berechnen."""
+    db = SessionLocal()
+    try:
+        member_ids = [row[0] for row in db.query(models.Member.id).all()]
+        latencies = []
+        start_all = time.perf_counter()
+        for member_id in member_ids:
+            start = time.perf_counter()
+            get_my_balance(current_user=SimpleNamespace(member_id=member_id), db=db)
+            latencies.append(time.perf_counter() - start)
+        total = time.perf_counter() - start_all
+    finally:
+        db.close()
+    result = summarize(latencies)
+    result["total_s"] = total
+    result["members_per_s"] = len(member_ids) / total if total else None
+    return {"balance all members": result}
+
+
+def bench_dunning():
+    """Mahnlauf über den ganzen Verein (erster Lauf mahnt, zweiter findet nichts)."""
+    results = {}
+    db = SessionLocal()
+    try:
+        for name in ("dunning run", "dunning run (nothing due)"):
+            start = time.perf_counter()
+            summary = dunning.run_dunning(db, today=datagen.TODAY + timedelta(days=31))
+            result = summarize([time.perf_counter() - start])
+            result["dunned"] = summary["dunned"]
+            results[name] = result
+    finally:
+        db.close()
+    return results
+
+
+def bench_import(rows, repeat):
+    results = {}
+    for dialect in datagen.BANK_DIALECTS:
+        content = datagen.bank_csv(dialect, rows)
+        durations, imported = [], 0
+        for i in range(repeat):
+            db = SessionLocal()
+            try:
+                start = time.perf_counter()
+                imported = csv_import.import_bank_csv(db, content, filename=f"bench-{dialect}-{i}.csv")
+                durations.append(time.perf_counter() - start)
+            finally:
+                db.close()
+        result = summarize(durations)
+        result["rows"] = rows
+        result["imported"] = imported
+        result["rejected"] = rows - imported
+        result["rows_per_s"] = rows / min(durations)
+        results[f"import {dialect}"] = result
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--iterations", type=int, default=20,
+                        help="Wiederholungen je Listen-Endpunkt (Portal: 5x so viele)")
+    parser.add_argument("--import-rows", type=int, default=None,
+                        help="Zeilen je Kontoauszug (Standard: 500 x scale)")
+    parser.add_argument("--import-repeat", type=int, default=3)
+    parser.add_argument("--out", default="bench-results.json")
+    args = parser.parse_args()
+
+    counts = datagen.generate(scale=args.scale, seed=args.seed)
+    import_rows = args.import_rows or 500 * args.scale
+
+    results = {}
+    with TestClient(app) as client:
+        results.update(bench_endpoints(client, args.iterations))
+    results.update(bench_balances())
+    results.update(bench_dunning())
+    # Import zuletzt, er vergrößert bank_transactions
+    results.update(bench_import(import_rows, args.import_repeat))
+
+    meta = metadata(kind="bench", scale=args.scale, seed=args.seed, counts=vars(counts))
+    save(args.out, meta, results)
+    for name, result in results.items():
+        print(f"{name:40s} p50={result.get('p50_ms', 0):9.2f} ms  p95={result.get('p95_ms', 0):9.2f} ms")
+    print("Ergebnisse:", args.out)
+
+
+if __name__ == "__main__":
+    main()
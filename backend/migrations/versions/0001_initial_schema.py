@@ -0,0 +1,172 @@
+"""initial schema
+
+Stand der Tabellen, wie sie bisher per Base.metadata.create_all angelegt
+wurden. Bestehende Datenbanken ohne Versionstabelle werden von
+``python -m app.migrate`` auf diese Revision gestempelt statt neu angelegt.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('calendar_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('start', sa.DateTime(), nullable=False),
+    sa.Column('end', sa.DateTime(), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('is_public', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_calendar_events_id'), 'calendar_events', ['id'], unique=False)
+
+    op.create_table('members',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('first_name', sa.String(length=100), nullable=False),
+    sa.Column('last_name', sa.String(length=100), nullable=False),
+    sa.Column('email', sa.String(length=200), nullable=True),
+    sa.Column('phone', sa.String(length=50), nullable=True),
+    sa.Column('street', sa.String(length=200), nullable=True),
+    sa.Column('zip_code', sa.String(length=10), nullable=True),
+    sa.Column('city', sa.String(length=100), nullable=True),
+    sa.Column('iban', sa.String(length=34), nullable=True),
+    sa.Column('bic', sa.String(length=11), nullable=True),
+    sa.Column('member_since', sa.Date(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email')
+    )
+    op.create_index(op.f('ix_members_id'), 'members', ['id'], unique=False)
+
+    op.create_table('parcels',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('number', sa.String(length=50), nullable=False),
+    sa.Column('size_sqm', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('number')
+    )
+    op.create_index(op.f('ix_parcels_id'), 'parcels', ['id'], unique=False)
+
+    op.create_table('contracts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('member_id', sa.Integer(), nullable=False),
+    sa.Column('parcel_id', sa.Integer(), nullable=False),
+    sa.Column('start_date', sa.Date(), nullable=False),
+    sa.Column('end_date', sa.Date(), nullable=True),
+    sa.Column('status', sa.Enum('ACTIVE', 'ENDED', 'PENDING', name='contractstatus'), nullable=True),
+    sa.Column('yearly_rent', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('yearly_additional', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['member_id'], ['members.id'], ),
+    sa.ForeignKeyConstraint(['parcel_id'], ['parcels.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_contracts_id'), 'contracts', ['id'], unique=False)
+
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(length=200), nullable=False),
+    sa.Column('password_hash', sa.String(length=255), nullable=False),
+    sa.Column('role', sa.Enum('ADMIN', 'MEMBER', name='userrole'), nullable=False),
+    sa.Column('member_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['member_id'], ['members.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+
+    op.create_table('invoices',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('member_id', sa.Integer(), nullable=False),
+    sa.Column('contract_id', sa.Integer(), nullable=True),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('invoice_date', sa.Date(), nullable=False),
+    sa.Column('due_date', sa.Date(), nullable=True),
+    sa.Column('total_amount', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('status', sa.Enum('OPEN', 'PAID', 'PARTIAL', 'CANCELLED', name='invoicestatus'), nullable=True),
+    sa.ForeignKeyConstraint(['contract_id'], ['contracts.id'], ),
+    sa.ForeignKeyConstraint(['member_id'], ['members.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_invoices_id'), 'invoices', ['id'], unique=False)
+
+    op.create_table('bank_transactions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('booking_date', sa.Date(), nullable=False),
+    sa.Column('value_date', sa.Date(), nullable=True),
+    sa.Column('amount', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('balance', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('purpose', sa.Text(), nullable=True),
+    sa.Column('counterparty_name', sa.String(length=255), nullable=True),
+    sa.Column('counterparty_iban', sa.String(length=34), nullable=True),
+    sa.Column('raw_data', sa.JSON(), nullable=True),
+    sa.Column('import_filename', sa.String(length=255), nullable=True),
+    sa.Column('matched_invoice_id', sa.Integer(), nullable=True),
+    sa.Column('matched_member_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['matched_invoice_id'], ['invoices.id'], ),
+    sa.ForeignKeyConstraint(['matched_member_id'], ['members.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_bank_transactions_id'), 'bank_transactions', ['id'], unique=False)
+
+    op.create_table('cashbook_entries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('type', sa.Enum('INCOME', 'EXPENSE', name='cashbooktype'), nullable=False),
+    sa.Column('category', sa.String(length=100), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('amount', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('invoice_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['invoice_id'], ['invoices.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_cashbook_entries_id'), 'cashbook_entries', ['id'], unique=False)
+
+    op.create_table('invoice_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('invoice_id', sa.Integer(), nullable=False),
+    sa.Column('description', sa.String(length=255), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['invoice_id'], ['invoices.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_invoice_items_id'), 'invoice_items', ['id'], unique=False)
+
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_invoice_items_id'), table_name='invoice_items')
+    op.drop_table('invoice_items')
+    op.drop_index(op.f('ix_cashbook_entries_id'), table_name='cashbook_entries')
+    op.drop_table('cashbook_entries')
+    op.drop_index(op.f('ix_bank_transactions_id'), table_name='bank_transactions')
+    op.drop_table('bank_transactions')
+    op.drop_index(op.f('ix_invoices_id'), table_name='invoices')
+    op.drop_table('invoices')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
+    op.drop_index(op.f('ix_contracts_id'), table_name='contracts')
+    op.drop_table('contracts')
+    op.drop_index(op.f('ix_parcels_id'), table_name='parcels')
+    op.drop_table('parcels')
+    op.drop_index(op.f('ix_members_id'), table_name='members')
+    op.drop_table('members')
+    op.drop_index(op.f('ix_calendar_events_id'), table_name='calendar_events')
+    op.drop_table('calendar_events')
+    for enum_name in ("contractstatus", "userrole", "invoicestatus", "cashbooktype"):
+        sa.Enum(name=enum_name).drop(op.get_bind(), checkfirst=True)
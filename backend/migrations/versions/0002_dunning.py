@@ -0,0 +1,60 @@
+"""dunning
+
+Mahnstufe an Rechnungen, Teilindex auf offene Rechnungen nach Fälligkeit,
+Index für die Zuordnung von Zahlungen und Warteschlange für Benachrichtigungen.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OPEN_STATUS = sa.text("status IN ('OPEN', 'PARTIAL')")
+PENDING = sa.text('sent_at IS NULL')
+
+
+def upgrade() -> None:
+    op.add_column('invoices', sa.Column('dunning_level', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('invoices', sa.Column('last_dunned_at', sa.Date(), nullable=True))
+    op.create_index('ix_invoices_open_due_date', 'invoices', ['due_date'], unique=False,
+                    postgresql_where=OPEN_STATUS, sqlite_where=OPEN_STATUS)
+
+    op.create_index(op.f('ix_bank_transactions_matched_invoice_id'), 'bank_transactions',
+                    ['matched_invoice_id'], unique=False)
+
+    op.create_table('notifications',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('member_id', sa.Integer(), nullable=False),
+    sa.Column('invoice_id', sa.Integer(), nullable=True),
+    sa.Column('kind', sa.String(length=50), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['invoice_id'], ['invoices.id'], ),
+    sa.ForeignKeyConstraint(['member_id'], ['members.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_notifications_id'), 'notifications', ['id'], unique=False)
+    op.create_index('ix_notifications_pending', 'notifications', ['created_at'], unique=False,
+                    postgresql_where=PENDING, sqlite_where=PENDING)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notifications_pending', table_name='notifications')
+    op.drop_index(op.f('ix_notifications_id'), table_name='notifications')
+    op.drop_table('notifications')
+    op.drop_index(op.f('ix_bank_transactions_matched_invoice_id'), table_name='bank_transactions')
+    op.drop_index('ix_invoices_open_due_date', table_name='invoices')
+    with op.batch_alter_table('invoices') as batch_op:
+        batch_op.drop_column('last_dunned_at')
+        batch_op.drop_column('dunning_level')
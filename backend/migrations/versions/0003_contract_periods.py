@@ -0,0 +1,93 @@
+"""contract periods
+
+Vertragszeiträume je Parzelle dürfen sich nicht überschneiden.
+PostgreSQL: Exclusion-Constraint (GiST, btree_gist) auf
+``daterange(start_date, end_date, '[]')``, der zugleich als Bereichsindex für
+Belegungsabfragen dient. SQLite: Trigger mit derselben Prüfung über
+``ix_contracts_parcel_start``.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OVERLAPPING_CONTRACTS = """
+SELECT a.id, b.id, a.parcel_id
+FROM contracts a
+JOIN contracts b ON a.parcel_id = b.parcel_id AND a.id < b.id
+WHERE a.start_date <= COALESCE(b.end_date, '9999-12-31')
+  AND b.start_date <= COALESCE(a.end_date, '9999-12-31')
+"""
+
+INVALID_PERIODS = "SELECT id FROM contracts WHERE end_date < start_date"
+
+SQLITE_OVERLAP_CHECK = """
+WHEN EXISTS (
+    SELECT 1 FROM contracts c
+    WHERE c.parcel_id = NEW.parcel_id {exclude_self}
+      AND c.start_date <= COALESCE(NEW.end_date, '9999-12-31')
+      AND NEW.start_date <= COALESCE(c.end_date, '9999-12-31')
+)
+BEGIN
+    SELECT RAISE(ABORT, 'contracts_no_overlap');
+END
+"""
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    invalid = [row[0] for row in bind.execute(sa.text(INVALID_PERIODS))]
+    if invalid:
+        raise RuntimeError(
+            f"Verträge mit Ende vor Beginn, bitte vor der Migration bereinigen: {invalid[:20]}"
+        )
+    conflicts = bind.execute(sa.text(OVERLAPPING_CONTRACTS)).fetchall()
+    if conflicts:
+        listed = ", ".join(f"{a}/{b} (Parzelle {p})" for a, b, p in conflicts[:20])
+        raise RuntimeError(
+            f"{len(conflicts)} überschneidende Verträge, bitte vor der Migration bereinigen: {listed}"
+        )
+
+    with op.batch_alter_table('contracts') as batch_op:
+        batch_op.create_check_constraint('ck_contracts_period', 'end_date IS NULL OR end_date >= start_date')
+    op.create_index('ix_contracts_parcel_start', 'contracts', ['parcel_id', 'start_date'], unique=False)
+
+    if bind.dialect.name == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        op.execute(
+            "ALTER TABLE contracts ADD CONSTRAINT contracts_no_overlap "
+            "EXCLUDE USING gist (parcel_id WITH =, daterange(start_date, end_date, '[]') WITH &&)"
+        )
+    elif bind.dialect.name == 'sqlite':
+        op.execute(
+            "CREATE TRIGGER contracts_no_overlap_insert BEFORE INSERT ON contracts "
+            + SQLITE_OVERLAP_CHECK.format(exclude_self="")
+        )
+        op.execute(
+            "CREATE TRIGGER contracts_no_overlap_update "
+            "BEFORE UPDATE OF parcel_id, start_date, end_date ON contracts "
+            + SQLITE_OVERLAP_CHECK.format(exclude_self="AND c.id != NEW.id")
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute("ALTER TABLE contracts DROP CONSTRAINT contracts_no_overlap")
+    elif bind.dialect.name == 'sqlite':
+        op.execute("DROP TRIGGER contracts_no_overlap_update")
+        op.execute("DROP TRIGGER contracts_no_overlap_insert")
+    op.drop_index('ix_contracts_parcel_start', table_name='contracts')
+    with op.batch_alter_table('contracts') as batch_op:
+        batch_op.drop_constraint('ck_contracts_period', type_='check')
@@ -0,0 +1,34 @@
+"""notification attempts
+
+Versandversuche an Benachrichtigungen: Anzahl, letzter Fehler und frühester
+nächster Versuch, damit dauerhaft scheiternde Mahnungen den Versand nicht
+blockieren.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('notifications', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('notifications', sa.Column('last_error', sa.Text(), nullable=True))
+    op.add_column('notifications', sa.Column('next_attempt_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('notifications') as batch_op:
+        batch_op.drop_column('next_attempt_at')
+        batch_op.drop_column('last_error')
+        batch_op.drop_column('attempts')
@@ -0,0 +1,92 @@
+"""SQLite-Schreibwarteschlange: fehlschlagende Schreiber dürfen sie nicht blockieren."""
+import datetime
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+BUSY_TIMEOUT = 5
+MEMBER = {"first_name": "Erika", "last_name": "Mustermann", "email": "erika@example.com"}
+BANK_CSV = "Buchungstag;Betrag;Verwendungszweck\n01.03.2024;12,50;Pacht 2024\n"
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    # Die Einstellungen werden beim Import von app.db gelesen
+    db_path = tmp_path_factory.mktemp("db") / "kgv.db"
+    os.environ.update(
+        DATABASE_URL=f"sqlite:///{db_path}",
+        SQLITE_BUSY_TIMEOUT=str(BUSY_TIMEOUT),
+        SQLITE_MAX_CONNECTIONS="4",
+        DB_POOL_SIZE="2",
+        DB_POOL_TIMEOUT=str(BUSY_TIMEOUT),
+        ASYNC_DB="0",
+    )
+    from app import migrate
+    from app.main import app
+
+    migrate.upgrade()
+    with TestClient(app, raise_server_exceptions=False) as c:
+        yield c
+
+
+def test_failing_writes_do_not_block_other_writers(client):
+    from app.db import write_queue
+
+    assert client.post("/members", json=MEMBER).status_code == 200
+
+    def duplicate_member():
+        return client.post("/members", json=MEMBER).status_code
+
+    def import_bank_file():
+        return client.post("/bank/import", files={"file": ("konto.csv", BANK_CSV)}).status_code
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        duplicates = [pool.submit(duplicate_member) for _ in range(10)]
+        imports = [pool.submit(import_bank_file) for _ in range(10)]
+        duplicate_codes = [f.result() for f in duplicates]
+        import_codes = [f.result() for f in imports]
+
+    assert time.monotonic() - start < BUSY_TIMEOUT
+    assert duplicate_codes == [500] * 10
+    assert import_codes == [200] * 10
+    # Warteschlange ist wieder frei
+    write_queue.acquire()
+    write_queue.release()
+
+
+def test_writer_does_not_wait_for_pool_held_by_queued_sessions(client):
+    # Mehr Sessions als Verbindungen; wer schon gelesen hat, hält seine Verbindung in der Warteschlange
+    from app import models
+    from app.db import SessionLocal
+
+    errors = []
+
+    def write(read_first):
+        db = SessionLocal()
+        try:
+            if read_first:
+                db.query(models.Member.id).first()
+                time.sleep(0.01)
+            db.add(models.CashbookEntry(
+                date=datetime.date(2024, 3, 1), type=models.CashbookType.INCOME, amount=1,
+            ))
+            db.commit()
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            db.close()
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=write, args=(i % 2 == 1,)) for i in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert time.monotonic() - start < BUSY_TIMEOUT
@@ -11,7 +11,20 @@ api.interceptors.request.use((config) => {
   if (token) {
     config.headers.Authorization = `Bearer ${token}`
   }
+  // Nach eigenen Änderungen eine Weile von der Primär-DB lesen (Read-your-writes)
+  const primaryUntil = sessionStorage.getItem('primary_until')
+  if (primaryUntil) {
+    config.headers['X-Primary-Until'] = primaryUntil
+  }
   return config
 })
 
+api.interceptors.response.use((response) => {
+  const primaryUntil = response.headers['x-primary-until']
+  if (primaryUntil) {
+    sessionStorage.setItem('primary_until', primaryUntil)
+  }
+  return response
+})
+
 export default api